@@ -0,0 +1,182 @@
+"""
+Versioned model artifacts.
+
+A trained model + scaler pair is written once (see train_sklearn_model.py)
+as a single uncompressed joblib file next to a manifest.json that records
+its SHA-256 content hash. The first 12 hex digits of the hash are the model
+version. Servers load the artifact at startup and verify the hash instead of
+retraining in every worker.
+
+For RandomForest models the compiled tree arrays and the scaler's mean/scale
+are also written as plain .npy files. load_shared_artifact() memory-maps
+them read-only, so N uvicorn workers share one physical copy of the model
+through the page cache instead of each unpickling its own.
+"""
+from datetime import datetime, timezone
+import numpy as np
+import hashlib
+import joblib
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_DIR = os.getenv("ARTIFACT_DIR", "artifacts")
+# Serve from memory-mapped arrays shared by all worker processes
+ARTIFACT_MMAP = os.getenv("ARTIFACT_MMAP", "0") == "1"
+MANIFEST_NAME = "manifest.json"
+
+
+class ArtifactError(Exception):
+    """Raised when an artifact is missing or fails verification"""
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    """Hex SHA-256 of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def save_artifact(model, scaler, directory=ARTIFACT_DIR, metadata=None):
+    """Write model + scaler and a manifest; returns the manifest dict"""
+    import sklearn
+
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = os.path.join(directory, "artifact.joblib.tmp")
+    joblib.dump({"model": model, "scaler": scaler}, tmp_path)
+
+    sha256 = file_sha256(tmp_path)
+    version = sha256[:12]
+    filename = f"diabetes_model-{version}.joblib"
+    os.replace(tmp_path, os.path.join(directory, filename))
+
+    arrays = None
+    if hasattr(model, "estimators_"):
+        arrays = export_shared_arrays(model, scaler, os.path.join(directory, f"diabetes_model-{version}.arrays"))
+
+    manifest = {
+        "version": version,
+        "sha256": sha256,
+        "file": filename,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "model_type": type(model).__name__,
+        "scaler_type": type(scaler).__name__,
+        "sklearn_version": sklearn.__version__,
+        "arrays": arrays,
+        **(metadata or {}),
+    }
+
+    # Write the manifest last and atomically, so readers never see a half-written artifact
+    manifest_tmp = os.path.join(directory, MANIFEST_NAME + ".tmp")
+    with open(manifest_tmp, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(manifest_tmp, os.path.join(directory, MANIFEST_NAME))
+    return manifest
+
+
+def read_manifest(directory=ARTIFACT_DIR):
+    """Load manifest.json, raising ArtifactError if it is missing or unreadable"""
+    path = os.path.join(directory, MANIFEST_NAME)
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        raise ArtifactError(f"No artifact manifest at {path}")
+    except (OSError, ValueError) as e:
+        raise ArtifactError(f"Unreadable artifact manifest {path}: {e}")
+
+
+def load_artifact(directory=ARTIFACT_DIR, verify=True):
+    """Return (model, scaler, manifest) for the artifact described by manifest.json"""
+    manifest = read_manifest(directory)
+    path = os.path.join(directory, manifest["file"])
+    if not os.path.exists(path):
+        raise ArtifactError(f"Artifact file {path} listed in manifest does not exist")
+
+    if verify:
+        sha256 = file_sha256(path)
+        if sha256 != manifest["sha256"]:
+            raise ArtifactError(
+                f"Artifact {path} hash mismatch: {sha256[:12]} != {manifest['version']}"
+            )
+
+    bundle = joblib.load(path)
+    return bundle["model"], bundle["scaler"], manifest
+
+
+def export_shared_arrays(model, scaler, path):
+    """
+    Write the compiled forest and scaler parameters as uncompressed .npy files.
+
+    Returns the manifest entry ({"dir", "sha256"}) or None if the compiled
+    forest does not reproduce predict_proba exactly.
+    """
+    from forest_engine import CompiledForest, check_forest_parity
+    from fusion import FusedScaler
+
+    compiled = CompiledForest(model)
+    if not check_forest_parity(model, compiled):
+        logger.warning("Compiled forest does not match predict_proba, not exporting shared arrays")
+        return None
+
+    compiled.save(path)
+    fused = FusedScaler(scaler)
+    np.save(os.path.join(path, "scaler_mean.npy"), fused.mean, allow_pickle=False)
+    np.save(os.path.join(path, "scaler_scale.npy"), fused.scale, allow_pickle=False)
+
+    hashes = {name: file_sha256(os.path.join(path, name)) for name in sorted(os.listdir(path))}
+    return {"dir": os.path.basename(path), "sha256": hashes}
+
+
+def load_shared_artifact(directory=ARTIFACT_DIR, verify=True):
+    """
+    Return (compiled_forest, fused_scaler, manifest) backed by memory-mapped arrays.
+
+    No sklearn objects are unpickled; the arrays stay read-only views of the
+    page cache shared by every process that maps them.
+    """
+    from forest_engine import CompiledForest
+    from fusion import FusedScaler
+
+    manifest = read_manifest(directory)
+    arrays = manifest.get("arrays")
+    if not arrays:
+        raise ArtifactError(f"Artifact {manifest['version']} has no shared arrays; re-run train_sklearn_model.py")
+
+    path = os.path.join(directory, arrays["dir"])
+    if not os.path.isdir(path):
+        raise ArtifactError(f"Shared array directory {path} does not exist")
+
+    if verify:
+        for name, expected in arrays["sha256"].items():
+            if file_sha256(os.path.join(path, name)) != expected:
+                raise ArtifactError(f"Shared array {name} hash mismatch in {path}")
+
+    forest = CompiledForest.load(path, mmap_mode="r")
+    scaler = FusedScaler.from_arrays(
+        np.load(os.path.join(path, "scaler_mean.npy"), mmap_mode="r"),
+        np.load(os.path.join(path, "scaler_scale.npy"), mmap_mode="r"),
+    )
+    return forest, scaler, manifest
+
+
+def paths_sha256(*paths):
+    """Combined SHA-256 of files and directory trees, e.g. to version plain model files"""
+    digest = hashlib.sha256()
+    for path in paths:
+        if os.path.isdir(path):
+            files = sorted(
+                os.path.join(root, name)
+                for root, _, names in os.walk(path)
+                for name in names
+            )
+        else:
+            files = [path]
+        for file_path in files:
+            digest.update(os.path.relpath(file_path, path).encode())
+            digest.update(file_sha256(file_path).encode())
+    return digest.hexdigest()
@@ -0,0 +1,460 @@
+"""
+Pluggable inference backends.
+
+main.py, main_sklearn.py and main_savedmodel.py used to be three copies of
+the service, each with its own loading and scoring code. A backend wraps one
+way of turning a raw (n, 8) feature array (FEATURE_NAMES order) into class-1
+probabilities. server.py builds the single app around the backend chosen by
+MODEL_BACKEND, so batching, caching, warm-up and monitoring work the same
+for every model.
+
+Register a new backend with @register_backend("name") on a Backend subclass.
+"""
+from artifacts import (
+    ARTIFACT_DIR, ARTIFACT_MMAP, MANIFEST_NAME, ArtifactError, load_artifact, load_shared_artifact, paths_sha256
+)
+from executor import NATIVE_THREADS
+from features import INPUT_PATH, check_feature_names
+from forest_engine import select_forest
+from fusion import KERAS_PARITY_ATOL, sample_rows, select_keras_model, select_scaler
+from mlp_engine import MLP_WEIGHTS_PATH, NumpyMLP
+from onnx_export import FOREST_ONNX_PATH, PARITY_METADATA_KEY, onnx_predict, parity_error
+from tf_serving import pin_threads, select_keras_signature
+from warmup import warm_up
+import numpy as np
+import importlib
+import json
+import logging
+import os
+import time
+import traceback
+
+logger = logging.getLogger(__name__)
+
+# "forest" (versioned artifact), "sklearn" (joblib files), "keras" (SavedModel/HDF5),
+# "onnx" (ONNX Runtime) or "mlp" (Keras weights run in NumPy)
+MODEL_BACKEND = os.getenv("MODEL_BACKEND", "forest").lower()
+
+# Retrain in-process when no artifact is found (slow; every worker trains its own copy)
+MODEL_TRAIN_FALLBACK = os.getenv("MODEL_TRAIN_FALLBACK", "0") == "1"
+
+SKLEARN_MODEL_PATH = "diabetes_model.joblib"
+SCALER_PATH = "scaler.joblib"
+KERAS_MODEL_PATH = "diabetes_model_savedmodel"
+KERAS_H5_PATH = "diabetes_model.h5"
+
+# ONNX graph to serve (diabetes_model_keras.onnx for the network) and its thread pools
+ONNX_MODEL_PATH = os.getenv("ONNX_MODEL_PATH", FOREST_ONNX_PATH)
+ONNX_INTRA_OP_THREADS = int(os.getenv("ONNX_INTRA_OP_THREADS", str(NATIVE_THREADS)))
+ONNX_INTER_OP_THREADS = int(os.getenv("ONNX_INTER_OP_THREADS", "1"))
+
+BACKENDS = {}
+
+
+def register_backend(name):
+    """Class decorator adding a Backend subclass to the registry under `name`"""
+    def decorator(cls):
+        cls.name = name
+        BACKENDS[name] = cls
+        return cls
+    return decorator
+
+
+def create_backend(name=MODEL_BACKEND):
+    """Instantiate a registered backend, raising ValueError for unknown names"""
+    try:
+        backend_cls = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown MODEL_BACKEND {name!r}, expected one of {sorted(BACKENDS)}")
+    return backend_cls()
+
+
+class Backend:
+    """Interface implemented by every inference backend"""
+
+    name = None
+    title = "Diabetes Prediction API"
+    description = ""
+    # Slow backends load in a background thread when FAST_START is on
+    background_load = False
+
+    def __init__(self):
+        # Original model/scaler objects; both set means the backend can serve
+        self.model = None
+        self.scaler = None
+        self.version = None
+        self.source = None
+        self.warmup_report = None
+
+    @property
+    def loaded(self):
+        return self.model is not None and self.scaler is not None
+
+    def load(self, timed_import=importlib.import_module):
+        """Load model and scaler; returns True on success"""
+        raise NotImplementedError
+
+    def scale(self, X):
+        """Model input for a raw (n, 8) float64 array; may modify X in place"""
+        return X
+
+    def infer(self, X):
+        """Class-1 probabilities for the output of scale()"""
+        raise NotImplementedError
+
+    def predict_batch(self, X):
+        """Class-1 probabilities for a raw (n, 8) float64 array; X may be modified in place"""
+        return self.infer(self.scale(X))
+
+    def predict_frame(self, frame):
+        """DataFrame input path (INPUT_PATH=dataframe), kept for latency A/B tests"""
+        return self.predict_batch(frame.to_numpy(dtype=np.float64))
+
+    def warm_up(self, bounds):
+        """Score sample batches at every batcher batch size; returns (and keeps) the timing report"""
+        self.warmup_report = warm_up(self.predict_batch, bounds)
+        return self.warmup_report
+
+    def watch_paths(self):
+        """Files (or directories) the model is loaded from, polled by the hot-reload watcher"""
+        return []
+
+    def describe(self):
+        """Backend name, model/scaler types and version"""
+        return {
+            "backend": self.name,
+            "model_type": type(self.model).__name__ if self.model is not None else None,
+            "scaler_type": type(self.scaler).__name__ if self.scaler is not None else None,
+            "model_version": self.version,
+            "model_source": self.source,
+        }
+
+
+class RandomForestBackend(Backend):
+    """Shared loading and scoring for the RandomForest backends"""
+
+    description = "FastAPI backend for diabetes prediction using Random Forest"
+
+    def __init__(self):
+        super().__init__()
+        # Compiled forest / fused scaler actually used for scoring
+        self.serving_model = None
+        self.serving_scaler = None
+
+    def load_shared(self):
+        """Serve straight from memory-mapped artifact arrays; False if unavailable"""
+        try:
+            serving_model, serving_scaler, manifest = load_shared_artifact(ARTIFACT_DIR)
+        except ArtifactError as e:
+            logger.warning(f"Shared arrays unavailable, loading the joblib model instead: {e}")
+            return False
+
+        # No sklearn objects are unpickled in this mode, so workers share every model page
+        self.serving_model, self.serving_scaler = serving_model, serving_scaler
+        self.version = manifest["version"]
+        self.source = "shared arrays"
+        self.model, self.scaler = serving_model, serving_scaler
+        logger.info(f"✓ Memory-mapped {manifest['arrays']['dir']} (version {self.version})")
+        return True
+
+    def scale(self, X):
+        return self.serving_scaler.transform(X)
+
+    def infer(self, X):
+        return self.serving_model.predict_proba(X)[:, 1]
+
+    def describe(self):
+        return {**super().describe(), "engine": type(self.serving_model).__name__}
+
+
+@register_backend("forest")
+class ForestArtifactBackend(RandomForestBackend):
+    """RandomForest from the versioned artifact written by train_sklearn_model.py"""
+
+    def load(self, timed_import=importlib.import_module):
+        logger.info(f"Loading model artifact from {ARTIFACT_DIR}/ ...")
+        started = time.perf_counter()
+
+        if not (ARTIFACT_MMAP and self.load_shared()):
+            try:
+                model, scaler, manifest = load_artifact(ARTIFACT_DIR)
+                self.version = manifest["version"]
+                self.source = "artifact"
+                logger.info(f"✓ Artifact loaded: {manifest['file']} (version {self.version})")
+            except ArtifactError as e:
+                if not MODEL_TRAIN_FALLBACK:
+                    logger.error(f"❌ {e}")
+                    logger.error("Run train_sklearn_model.py or set MODEL_TRAIN_FALLBACK=1")
+                    return False
+
+                logger.warning(f"{e} - training a new model (MODEL_TRAIN_FALLBACK=1)")
+                from train_sklearn_model import train_model
+                model, scaler = train_model()
+                self.version = "untracked"
+                self.source = "trained"
+
+            self.serving_model = select_forest(model)
+            self.serving_scaler = select_scaler(scaler)
+            self.model, self.scaler = model, scaler
+
+        startup_seconds = time.perf_counter() - started
+        logger.info(f"Model initialized from {self.source} in {startup_seconds * 1000:.1f} ms")
+        return True
+
+    def watch_paths(self):
+        # Training writes the manifest last (atomically), so it marks a complete artifact
+        return [os.path.join(ARTIFACT_DIR, MANIFEST_NAME)]
+
+
+@register_backend("sklearn")
+class SklearnJoblibBackend(RandomForestBackend):
+    """RandomForest from diabetes_model.joblib + scaler.joblib"""
+
+    def load(self, timed_import=importlib.import_module):
+        if ARTIFACT_MMAP:
+            logger.info(f"Memory-mapping shared model arrays from {ARTIFACT_DIR}/ ...")
+            if self.load_shared():
+                return True
+
+        joblib = timed_import("joblib")
+        logger.info("Loading model and scaler...")
+        model = joblib.load(SKLEARN_MODEL_PATH)
+        logger.info("✓ Model loaded successfully")
+        scaler = joblib.load(SCALER_PATH)
+        logger.info("✓ Scaler loaded successfully")
+
+        # Check the feature layout once so requests can skip sklearn's per-call check
+        try:
+            checked_scaler = check_feature_names(scaler, "scaler")
+            checked_model = check_feature_names(model, "model")
+        except ValueError as e:
+            logger.error(f"❌ Feature layout mismatch: {e}")
+            return False
+        logger.info(f"✓ Feature layout verified (input path: {INPUT_PATH})")
+
+        self.serving_scaler = select_scaler(checked_scaler)
+        self.serving_model = select_forest(checked_model)
+        # Plain joblib files carry no manifest, so version them by content
+        self.version = paths_sha256(SKLEARN_MODEL_PATH, SCALER_PATH)[:12]
+        self.source = "joblib"
+        self.model, self.scaler = model, scaler
+        return True
+
+    def predict_frame(self, frame):
+        cols = list(frame.columns)
+        frame[cols] = self.scaler.transform(frame[cols])
+
+        # Get probability for class 1 (diabetes)
+        return self.model.predict_proba(frame)[:, 1]
+
+    def watch_paths(self):
+        if self.source == "shared arrays":
+            return [os.path.join(ARTIFACT_DIR, MANIFEST_NAME)]
+        return [SKLEARN_MODEL_PATH, SCALER_PATH]
+
+
+@register_backend("keras")
+class KerasBackend(Backend):
+    """Keras network from the SavedModel directory, falling back to HDF5"""
+
+    title = "Diabetes Prediction Deep Learning API"
+    description = "FastAPI backend for diabetes prediction using TensorFlow"
+    background_load = True
+
+    def __init__(self):
+        super().__init__()
+        # Scaler-folded clone of the model when the parity check allows it
+        self.serving_model = None
+        self.serving_scaler = None
+        self.scaler_folded = False
+        # Padded tf.function signatures replacing model.predict (KERAS_SERVING=function)
+        self.signature = None
+
+    def load(self, timed_import=importlib.import_module):
+        logger.info("=" * 60)
+        logger.info("LOADING MODEL AND SCALER")
+        logger.info("=" * 60)
+        logger.info(f"Files in current directory: {os.listdir('.')}")
+
+        loaded_model = None
+        loaded_model_path = None
+
+        # Try to load TensorFlow model from SavedModel format
+        tf = timed_import("tensorflow")
+        logger.info(f"TensorFlow Version: {tf.__version__}")
+        pin_threads(tf)
+        logger.info(f"Attempting to load model from SavedModel: {KERAS_MODEL_PATH}")
+        logger.info(f"Model directory exists: {os.path.exists(KERAS_MODEL_PATH)}")
+        try:
+            loaded_model = tf.keras.models.load_model(KERAS_MODEL_PATH)
+            loaded_model_path = KERAS_MODEL_PATH
+            logger.info("✓✓✓ MODEL LOADED SUCCESSFULLY (SavedModel) ✓✓✓")
+        except Exception as e:
+            logger.warning(f"SavedModel load failed: {type(e).__name__}")
+            # Try HDF5 as fallback
+            logger.info("Trying HDF5 format as fallback...")
+            try:
+                loaded_model = tf.keras.models.load_model(KERAS_H5_PATH)
+                loaded_model_path = KERAS_H5_PATH
+                logger.info("✓✓✓ MODEL LOADED SUCCESSFULLY (HDF5) ✓✓✓")
+            except Exception as e2:
+                logger.error(f"HDF5 load also failed: {type(e2).__name__}: {e2}")
+                logger.error(traceback.format_exc())
+                return False
+
+        joblib = timed_import("joblib")
+        logger.info(f"Attempting to load scaler from: {SCALER_PATH}")
+        loaded_scaler = joblib.load(SCALER_PATH)
+        logger.info("✓✓✓ SCALER LOADED SUCCESSFULLY ✓✓✓")
+
+        # Check the feature layout once so requests can skip sklearn's per-call check
+        try:
+            checked_scaler = check_feature_names(loaded_scaler, "scaler")
+        except ValueError as e:
+            logger.error(f"❌ Feature layout mismatch: {e}")
+            return False
+        logger.info(f"✓ Feature layout verified (input path: {INPUT_PATH})")
+
+        # Publish the serving objects before the model/scaler that gate /predict
+        self.serving_model, self.scaler_folded = select_keras_model(loaded_model, checked_scaler)
+        self.serving_scaler = checked_scaler if self.scaler_folded else select_scaler(checked_scaler)
+        rows = sample_rows(checked_scaler)
+        if not self.scaler_folded:
+            rows = self.serving_scaler.transform(rows)
+        self.signature = select_keras_signature(self.serving_model, rows)
+        self.version = paths_sha256(loaded_model_path, SCALER_PATH)[:12]
+        self.source = loaded_model_path
+        self.model, self.scaler = loaded_model, loaded_scaler
+        return True
+
+    def scale(self, X):
+        # A folded model takes raw features
+        if self.scaler_folded:
+            return X
+        return self.serving_scaler.transform(X)
+
+    def infer(self, X):
+        if self.signature is not None:
+            return self.signature.predict(X)
+        # Single forward pass over the whole batch instead of Keras' default 32-row chunks
+        return self.serving_model.predict(X, batch_size=len(X), verbose=0)[:, 0]
+
+    def predict_frame(self, frame):
+        # Simple scaling only (adjust if needed)
+        cols = list(frame.columns)
+        frame[cols] = self.scaler.transform(frame[cols])
+        return self.model.predict(frame, verbose=0)[:, 0]
+
+    def describe(self):
+        return {
+            **super().describe(),
+            "scaler_folded": self.scaler_folded,
+            "serving": "function" if self.signature is not None else "predict",
+            "buckets": self.signature.buckets if self.signature is not None else None,
+        }
+
+    def watch_paths(self):
+        return [KERAS_MODEL_PATH, KERAS_H5_PATH, SCALER_PATH]
+
+
+@register_backend("onnx")
+class OnnxBackend(Backend):
+    """ONNX export of the forest or the network, run by ONNX Runtime on CPU"""
+
+    description = "FastAPI backend for diabetes prediction using ONNX Runtime"
+
+    def __init__(self):
+        super().__init__()
+        self.session = None
+        self.parity_error = None
+
+    def load(self, timed_import=importlib.import_module):
+        ort = timed_import("onnxruntime")
+        logger.info(f"Loading ONNX model from {ONNX_MODEL_PATH} (onnxruntime {ort.__version__})")
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = ONNX_INTRA_OP_THREADS
+        options.inter_op_num_threads = ONNX_INTER_OP_THREADS
+        # One small graph: sequential execution avoids inter-op scheduling overhead
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        session = ort.InferenceSession(ONNX_MODEL_PATH, options, providers=["CPUExecutionProvider"])
+
+        # Repeat the export-time parity check with this onnxruntime build
+        metadata = session.get_modelmeta().custom_metadata_map
+        if PARITY_METADATA_KEY not in metadata:
+            logger.error(f"❌ {ONNX_MODEL_PATH} has no parity data; re-export it with onnx_export.py")
+            return False
+        parity = json.loads(metadata[PARITY_METADATA_KEY])
+        error = parity_error(session, np.array(parity["rows"]), parity["expected"])
+        if error > parity["atol"]:
+            logger.error(f"❌ ONNX parity check failed: max error {error:.2e} > {parity['atol']:.0e}")
+            return False
+        logger.info(f"✓ ONNX parity check passed (max error {error:.2e})")
+
+        self.session = session
+        self.parity_error = error
+        self.version = paths_sha256(ONNX_MODEL_PATH)[:12]
+        self.source = ONNX_MODEL_PATH
+        # The scaler is part of the graph
+        self.model = self.scaler = session
+        return True
+
+    def infer(self, X):
+        # The scaler is part of the graph, so scale() passes raw features through
+        return onnx_predict(self.session, X)
+
+    def describe(self):
+        return {
+            **super().describe(),
+            "intra_op_threads": ONNX_INTRA_OP_THREADS,
+            "inter_op_threads": ONNX_INTER_OP_THREADS,
+            "parity_error": self.parity_error,
+        }
+
+    def watch_paths(self):
+        return [ONNX_MODEL_PATH]
+
+
+@register_backend("mlp")
+class NumpyMLPBackend(Backend):
+    """Keras network weights from an .npz, forward pass in NumPy (no TensorFlow)"""
+
+    description = "FastAPI backend for diabetes prediction using the neural network in NumPy"
+
+    def __init__(self):
+        super().__init__()
+        self.parity_error = None
+
+    def load(self, timed_import=importlib.import_module):
+        logger.info(f"Loading network weights from {MLP_WEIGHTS_PATH}")
+        mlp = NumpyMLP.load(MLP_WEIGHTS_PATH)
+
+        # Repeat the export-time check against model.predict with the stored rows
+        error = mlp.parity_error()
+        if error > KERAS_PARITY_ATOL:
+            logger.error(f"❌ NumPy MLP parity check failed: max error {error:.2e} > {KERAS_PARITY_ATOL:.0e}")
+            return False
+        logger.info(f"✓ NumPy MLP parity check passed ({len(mlp.kernels)} layers, max error {error:.2e})")
+
+        self.parity_error = error
+        self.version = paths_sha256(MLP_WEIGHTS_PATH)[:12]
+        self.source = MLP_WEIGHTS_PATH
+        # The scaler is stored with the weights
+        self.model, self.scaler = mlp, mlp.scaler
+        return True
+
+    def scale(self, X):
+        return self.scaler.transform(X)
+
+    def infer(self, X):
+        return self.model.forward(X)
+
+    def describe(self):
+        return {
+            **super().describe(),
+            "layers": [kernel.shape[1] for kernel in self.model.kernels] if self.model is not None else None,
+            "parity_error": self.parity_error,
+        }
+
+    def watch_paths(self):
+        return [MLP_WEIGHTS_PATH]
@@ -0,0 +1,167 @@
+"""
+Dynamic micro-batching for the single-patient /predict route.
+
+Concurrent requests are queued and a background thread scores them together:
+a batch is flushed as soon as it holds BATCHER_MAX_BATCH_SIZE rows or the
+oldest row has waited BATCHER_MAX_WAIT_MS milliseconds. Each caller gets its
+own probability back, so the HTTP contract of /predict does not change.
+"""
+from concurrent.futures import Future
+import numpy as np
+import logging
+import os
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+BATCHER_ENABLED = os.getenv("BATCHER_ENABLED", "0") == "1"
+BATCHER_MAX_BATCH_SIZE = int(os.getenv("BATCHER_MAX_BATCH_SIZE", "32"))
+BATCHER_MAX_WAIT_MS = float(os.getenv("BATCHER_MAX_WAIT_MS", "2"))
+
+
+def batch_size_buckets(max_batch_size):
+    """Power-of-two upper bounds covering 1..max_batch_size"""
+    buckets = []
+    size = 1
+    while size < max_batch_size:
+        buckets.append(size)
+        size *= 2
+    buckets.append(max_batch_size)
+    return buckets
+
+
+class MicroBatcher:
+    """Collects single rows from many threads and scores them as one batch"""
+
+    def __init__(self, score_fn, max_batch_size=BATCHER_MAX_BATCH_SIZE,
+                 max_wait_ms=BATCHER_MAX_WAIT_MS, n_features=8):
+        self.score_fn = score_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self.n_features = n_features
+        self.buckets = batch_size_buckets(self.max_batch_size)
+
+        self._queue = queue.Queue()
+        self._thread = None
+        self._running = False
+        self._lock = threading.Lock()
+
+        # Stats
+        self._batch_size_counts = [0] * len(self.buckets)
+        self._batches = 0
+        self._rows = 0
+        self._errors = 0
+        self._max_queue_depth = 0
+
+    def start(self):
+        """Start the background scoring thread"""
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._thread.start()
+        logger.info(
+            f"✓ Micro-batcher started (max_batch_size={self.max_batch_size}, "
+            f"max_wait_ms={self.max_wait * 1000:.1f})"
+        )
+
+    def stop(self):
+        """Stop the scoring thread after draining queued rows"""
+        if not self._running:
+            return
+        self._running = False
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+        logger.info("Micro-batcher stopped")
+
+    def submit(self, row):
+        """Queue one feature row and block until its probability is ready"""
+        return self.enqueue(row).result()
+
+    def enqueue(self, row):
+        """Queue one feature row and return a Future for its probability; row must stay unchanged until then"""
+        if not self._running:
+            raise RuntimeError("Micro-batcher is not running")
+        future = Future()
+        self._queue.put((row, future))
+        depth = self._queue.qsize()
+        if depth > self._max_queue_depth:
+            self._max_queue_depth = depth
+        return future
+
+    def _collect(self):
+        """Block for the first row, then gather more until size or deadline"""
+        item = self._queue.get()
+        if item is None:
+            return []
+        items = [item]
+        deadline = time.perf_counter() + self.max_wait
+        while len(items) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining <= 0:
+                    item = self._queue.get_nowait()
+                else:
+                    item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                # Stop requested: score what we have, the loop exits afterwards
+                break
+            items.append(item)
+        return items
+
+    def _run(self):
+        batch = np.empty((self.max_batch_size, self.n_features), dtype=np.float64)
+        while self._running or not self._queue.empty():
+            items = self._collect()
+            if not items:
+                continue
+
+            n = len(items)
+            for i, (row, _) in enumerate(items):
+                batch[i] = row
+
+            try:
+                probabilities = self.score_fn(batch[:n])
+            except Exception as e:
+                logger.error(f"Micro-batch scoring failed: {e}")
+                with self._lock:
+                    self._errors += 1
+                for _, future in items:
+                    future.set_exception(e)
+                continue
+
+            for (_, future), probability in zip(items, probabilities):
+                future.set_result(float(probability))
+            self._record(n)
+
+    def _record(self, n):
+        with self._lock:
+            self._batches += 1
+            self._rows += n
+            for i, bound in enumerate(self.buckets):
+                if n <= bound:
+                    self._batch_size_counts[i] += 1
+                    break
+
+    def stats(self):
+        """Queue depth and batch-size histogram"""
+        with self._lock:
+            return {
+                "running": self._running,
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000,
+                "queue_depth": self._queue.qsize(),
+                "max_queue_depth": self._max_queue_depth,
+                "batches": self._batches,
+                "rows": self._rows,
+                "errors": self._errors,
+                "mean_batch_size": self._rows / self._batches if self._batches else 0.0,
+                "batch_size_histogram": {
+                    f"le_{bound}": count
+                    for bound, count in zip(self.buckets, self._batch_size_counts)
+                },
+            }
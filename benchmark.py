@@ -0,0 +1,353 @@
+"""
+Latency and throughput benchmark for the API.
+
+Generates PatientData workloads inside the Field(ge=..., le=...) ranges and
+drives the app either in-process through httpx's ASGI transport ("asgi") or
+over HTTP against a local uvicorn ("uvicorn"). Every combination of backend,
+endpoint, batch size and concurrency level is one scenario; each reports
+throughput and p50/p95/p99 latency. Results are written to JSON and can be
+compared against a previous run to flag regressions.
+
+Examples:
+
+    # Forest vs ONNX vs NumPy network, in-process and over uvicorn
+    python benchmark.py --backends forest onnx mlp --drivers asgi uvicorn
+
+    # Keras tf.function signatures vs model.predict
+    python benchmark.py --backends keras keras,KERAS_SERVING=predict --concurrency 1 8
+
+    # Fail (exit 1) if anything got >10% slower than the saved baseline
+    python benchmark.py --baseline benchmark_baseline.json --threshold 0.10
+
+Backend specs are `name[,KEY=VALUE...]`; the extra variables are set for that
+backend only. Model files are loaded relative to --workdir. Requires httpx
+(and uvicorn for the uvicorn driver).
+"""
+from datetime import datetime, timezone
+import numpy as np
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, REPO_DIR)
+
+from features import FEATURE_NAMES, field_bounds, sample_features  # noqa: E402
+from schemas import PatientData  # noqa: E402
+
+DEFAULT_ENDPOINTS = ["/predict", "/predict/batch"]
+DEFAULT_BATCH_SIZES = [1, 32, 256]
+DEFAULT_CONCURRENCY = [1, 8, 32]
+
+# Compared between runs; "higher" metrics regress when they drop
+LATENCY_METRICS = ("p50_ms", "p95_ms", "p99_ms")
+THROUGHPUT_METRICS = ("throughput_rps",)
+
+
+def parse_spec(spec):
+    """'keras,KERAS_SERVING=predict' -> ('keras', {'KERAS_SERVING': 'predict'})"""
+    name, *pairs = spec.split(",")
+    env = {}
+    for pair in pairs:
+        key, _, value = pair.partition("=")
+        env[key] = value
+    return name, env
+
+
+def make_patients(n_rows, seed=0):
+    """Random patients (JSON dicts) inside the PatientData field ranges"""
+    bounds = field_bounds(PatientData)
+    rows = sample_features(bounds, n_rows, seed)
+    patients = []
+    for row in rows:
+        patient = {}
+        for name, value in zip(FEATURE_NAMES, row):
+            patient[name] = int(value) if bounds[name][2] else round(float(value), 3)
+        patients.append(patient)
+    return patients
+
+
+def scenarios(args):
+    """(endpoint, batch_size, concurrency) combinations to run"""
+    for endpoint in args.endpoints:
+        batch_sizes = [1] if endpoint == "/predict" else args.batch_sizes
+        for batch_size in batch_sizes:
+            for concurrency in args.concurrency:
+                yield endpoint, batch_size, concurrency
+
+
+def summarize(latencies, wall_seconds, batch_size, errors):
+    """Throughput and latency percentiles for one scenario"""
+    ms = np.array(latencies) * 1000
+    completed = len(latencies)
+    return {
+        "requests": completed,
+        "errors": errors,
+        "throughput_rps": round(completed / wall_seconds, 2),
+        "rows_per_sec": round(completed * batch_size / wall_seconds, 2),
+        "mean_ms": round(float(ms.mean()), 3) if completed else None,
+        "p50_ms": round(float(np.percentile(ms, 50)), 3) if completed else None,
+        "p95_ms": round(float(np.percentile(ms, 95)), 3) if completed else None,
+        "p99_ms": round(float(np.percentile(ms, 99)), 3) if completed else None,
+        "max_ms": round(float(ms.max()), 3) if completed else None,
+    }
+
+
+async def drive(client, endpoint, batch_size, concurrency, n_requests, n_warmup, seed):
+    """Send n_requests from `concurrency` concurrent callers and time each one"""
+    pool = make_patients(max(n_requests + n_warmup, 1) * batch_size, seed)
+    payloads = []
+    for i in range(n_requests + n_warmup):
+        chunk = pool[i * batch_size:(i + 1) * batch_size]
+        payloads.append(chunk[0] if endpoint == "/predict" else {"patients": chunk})
+
+    for payload in payloads[:n_warmup]:
+        await client.post(endpoint, json=payload)
+
+    queue = iter(payloads[n_warmup:])
+    latencies = []
+    errors = 0
+
+    async def caller():
+        nonlocal errors
+        for payload in queue:
+            started = time.perf_counter()
+            response = await client.post(endpoint, json=payload)
+            elapsed = time.perf_counter() - started
+            if response.status_code == 200:
+                latencies.append(elapsed)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(caller() for _ in range(concurrency)))
+    return summarize(latencies, time.perf_counter() - started, batch_size, errors)
+
+
+async def run_scenarios(client, label, driver, args):
+    results = []
+    for endpoint, batch_size, concurrency in scenarios(args):
+        result = await drive(
+            client, endpoint, batch_size, concurrency, args.requests, args.warmup, args.seed
+        )
+        result = {
+            "backend": label, "driver": driver, "endpoint": endpoint,
+            "batch_size": batch_size, "concurrency": concurrency, **result,
+        }
+        print_result(result)
+        results.append(result)
+    return results
+
+
+async def run_asgi(label, args):
+    """Benchmark the app in this process through httpx's ASGI transport"""
+    import httpx
+    import server
+
+    # ASGITransport does not run lifespan events, so start the app by hand
+    await server.app.router.startup()
+    while server.loader.state in ("pending", "loading"):
+        await asyncio.sleep(0.1)
+    if not server.loader.ready:
+        raise RuntimeError(f"Backend {label} failed to load: {server.loader.status()}")
+    try:
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://asgi") as client:
+            return await run_scenarios(client, label, "asgi", args)
+    finally:
+        await server.app.router.shutdown()
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def run_uvicorn(label, env, args):
+    """Benchmark a local uvicorn serving the backend over HTTP"""
+    import httpx
+
+    port = free_port()
+    command = [
+        sys.executable, "-m", "uvicorn", "server:app", "--app-dir", REPO_DIR,
+        "--host", "127.0.0.1", "--port", str(port),
+        "--workers", str(args.workers), "--log-level", "warning",
+    ]
+    process = subprocess.Popen(command, cwd=args.workdir, env={**os.environ, **env})
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        async with httpx.AsyncClient(
+            base_url=base_url, timeout=60,
+            limits=httpx.Limits(max_connections=max(args.concurrency))
+        ) as client:
+            deadline = time.monotonic() + args.startup_timeout
+            while True:
+                if process.poll() is not None:
+                    raise RuntimeError(f"uvicorn exited with code {process.returncode}")
+                try:
+                    if (await client.get("/readyz")).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"{label} not ready after {args.startup_timeout} s")
+                await asyncio.sleep(0.2)
+            return await run_scenarios(client, label, "uvicorn", args)
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+def run_asgi_subprocess(spec, env, args):
+    """Run the in-process benchmark for one backend in a fresh interpreter"""
+    with tempfile.TemporaryDirectory() as tmp:
+        output = os.path.join(tmp, "results.json")
+        command = [
+            sys.executable, os.path.abspath(__file__), "--backends", spec, "--drivers", "asgi",
+            "--endpoints", *args.endpoints,
+            "--batch-sizes", *map(str, args.batch_sizes),
+            "--concurrency", *map(str, args.concurrency),
+            "--requests", str(args.requests), "--warmup", str(args.warmup),
+            "--seed", str(args.seed), "--workdir", args.workdir, "--output", output,
+        ]
+        subprocess.run(command, env={**os.environ, **env}, check=True)
+        with open(output) as f:
+            return json.load(f)["results"]
+
+
+def print_result(result):
+    print(
+        f"{result['backend']:<28} {result['driver']:<8} {result['endpoint']:<15} "
+        f"batch {result['batch_size']:>4}  conc {result['concurrency']:>3}  "
+        f"{result['throughput_rps']:>9.1f} req/s  {result['rows_per_sec']:>10.1f} rows/s  "
+        f"p50 {result['p50_ms']} ms  p95 {result['p95_ms']} ms  p99 {result['p99_ms']} ms"
+        + (f"  errors {result['errors']}" if result["errors"] else ""),
+        flush=True,
+    )
+
+
+def scenario_key(result):
+    return (result["backend"], result["driver"], result["endpoint"], result["batch_size"], result["concurrency"])
+
+
+def compare(baseline, results, threshold):
+    """Regressions beyond `threshold` (relative) against a previous run"""
+    previous = {scenario_key(r): r for r in baseline["results"]}
+    regressions = []
+    for result in results:
+        old = previous.get(scenario_key(result))
+        if old is None:
+            continue
+        for metric in LATENCY_METRICS + THROUGHPUT_METRICS:
+            before, after = old.get(metric), result.get(metric)
+            if not before or after is None:
+                continue
+            change = (after - before) / before
+            worse = change > threshold if metric in LATENCY_METRICS else change < -threshold
+            if worse:
+                regressions.append({
+                    "scenario": dict(zip(("backend", "driver", "endpoint", "batch_size", "concurrency"),
+                                         scenario_key(result))),
+                    "metric": metric,
+                    "baseline": before,
+                    "current": after,
+                    "change": round(change, 4),
+                })
+    return regressions
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Diabetes Prediction API")
+    parser.add_argument("--backends", nargs="+", default=[os.getenv("MODEL_BACKEND", "forest")],
+                        help="Backend specs: name[,KEY=VALUE...]")
+    parser.add_argument("--drivers", nargs="+", default=["asgi"], choices=["asgi", "uvicorn"])
+    parser.add_argument("--endpoints", nargs="+", default=DEFAULT_ENDPOINTS)
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=DEFAULT_BATCH_SIZES,
+                        help="Patients per /predict/batch request")
+    parser.add_argument("--concurrency", nargs="+", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--requests", type=int, default=500, help="Timed requests per scenario")
+    parser.add_argument("--warmup", type=int, default=20, help="Untimed requests per scenario")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", default=os.getcwd(), help="Directory holding the model files")
+    parser.add_argument("--startup-timeout", type=float, default=180)
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--baseline", help="Previous results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Relative change counted as a regression (0.10 = 10%%)")
+    args = parser.parse_args(argv)
+    args.workdir = os.path.abspath(args.workdir)
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    results = []
+    for spec in args.backends:
+        name, env = parse_spec(spec)
+        env = {**env, "MODEL_BACKEND": name}
+        for driver in args.drivers:
+            if driver == "uvicorn":
+                results += asyncio.run(run_uvicorn(spec, env, args))
+            elif len(args.backends) == 1 and "server" not in sys.modules:
+                # A single backend can be benchmarked (and profiled) right here
+                os.environ.update(env)
+                os.chdir(args.workdir)
+                results += asyncio.run(run_asgi(spec, args))
+            else:
+                # server.py binds its backend at import, so each one gets a fresh interpreter
+                results += run_asgi_subprocess(spec, env, args)
+
+    report = {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "requests_per_scenario": args.requests,
+        },
+        "results": results,
+    }
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(json.load(f), results, args.threshold)
+        report["regressions"] = regressions
+        for r in regressions:
+            s = r["scenario"]
+            print(
+                f"REGRESSION {s['backend']} {s['driver']} {s['endpoint']} batch {s['batch_size']} "
+                f"conc {s['concurrency']}: {r['metric']} {r['baseline']} -> {r['current']} "
+                f"({r['change']:+.1%})"
+            )
+        print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%} vs {args.baseline}")
+        exit_code = 1 if regressions else 0
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
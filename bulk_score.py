@@ -0,0 +1,412 @@
+"""
+Offline bulk scoring on batch nodes.
+
+Scores a CSV, NDJSON, Parquet or .npy file with the same backends (and therefore the
+same artifacts and code path) as the API: `--backend sklearn` loads
+diabetes_model.joblib + scaler.joblib like main_sklearn.py, `--backend keras`
+the SavedModel, `forest` the versioned artifact. The input is memory-mapped
+and split into tasks for a process pool sized to the available cores; each
+worker scores its tasks in --block-rows blocks, so memory per worker is
+bounded by one block regardless of the file size.
+
+Output format follows the output extension:
+
+    .csv / .ndjson   same records as POST /predict/stream
+                     (row, prediction, probability, predicted_outcome, error)
+    .npy             float64 probabilities, NaN for rejected rows
+
+Rows outside the PatientData bounds are rejected, exactly as in the API.
+Every task re-scores its first --verify-rows rows one at a time, the way
+/predict does, and the largest difference is reported; the exit status is 1
+when it is above --tolerance (default 0, i.e. bit-identical).
+
+Examples:
+
+    python bulk_score.py diabetes.csv scores.csv --backend sklearn
+    python bulk_score.py patients.parquet scores.npy --workers 16 --model-dir /models
+"""
+from executor import NATIVE_THREAD_ENV_VARS, available_cores
+from features import FEATURE_NAMES, N_FEATURES
+from schemas import PatientData
+from streaming import FORMATS, ChunkScorer, CsvFormat, NdjsonFormat
+from validation import ColumnarValidator
+import numpy as np
+import argparse
+import logging
+import mmap
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+logger = logging.getLogger(__name__)
+
+BLOCK_ROWS = 65536
+# Bytes of CSV read per step; blocks end on a line boundary
+CSV_BLOCK_BYTES = 8 * 1024 * 1024
+# Aim for this many tasks per worker so uneven tasks still balance
+TASKS_PER_WORKER = 4
+
+
+OUTPUT_FORMATS = {".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson", ".npy": "npy"}
+
+
+def _split(n_items, n_tasks):
+    """Boundaries splitting range(n_items) into n_tasks near-equal parts"""
+    n_tasks = max(1, min(n_tasks, n_items))
+    return [round(i * n_items / n_tasks) for i in range(n_tasks + 1)]
+
+
+class NpyInput:
+    """(n, 8) float array in FEATURE_NAMES order, memory-mapped"""
+
+    def __init__(self, path):
+        self.path = path
+        array = np.load(path, mmap_mode="r")
+        if array.ndim != 2 or array.shape[1] != N_FEATURES:
+            raise ValueError(f"{path} has shape {array.shape}, expected (n, {N_FEATURES})")
+        self.n_rows = len(array)
+
+    def tasks(self, n_tasks):
+        bounds = _split(self.n_rows, n_tasks)
+        return [(start, (start, stop)) for start, stop in zip(bounds, bounds[1:])]
+
+    def blocks(self, task, block_rows):
+        """(raw float64 block, parse errors) pairs for one task"""
+        start, stop = task
+        array = np.load(self.path, mmap_mode="r")
+        for block_start in range(start, stop, block_rows):
+            # Copy: the backends scale their input in place
+            yield np.array(array[block_start:min(block_start + block_rows, stop)], dtype=np.float64), {}
+
+
+class ParquetInput:
+    """Parquet file with the eight feature columns; tasks are row ranges within row groups"""
+
+    def __init__(self, path):
+        import pyarrow.parquet as pq
+
+        self.path = path
+        metadata = pq.ParquetFile(path, memory_map=True).metadata
+        missing = [name for name in FEATURE_NAMES if name not in metadata.schema.names]
+        if missing:
+            raise ValueError(f"{path} is missing columns {missing}")
+        self.group_rows = [metadata.row_group(i).num_rows for i in range(metadata.num_row_groups)]
+        self.n_rows = sum(self.group_rows)
+
+    def tasks(self, n_tasks):
+        # Row groups are split by their share of the rows, so a file with a
+        # single row group (pandas' default) still gets about n_tasks tasks
+        tasks = []
+        first_row = 0
+        for group, group_rows in enumerate(self.group_rows):
+            parts = -(-n_tasks * group_rows // max(self.n_rows, 1))
+            bounds = _split(group_rows, parts)
+            tasks += [(first_row + start, (group, start, stop)) for start, stop in zip(bounds, bounds[1:])]
+            first_row += group_rows
+        return tasks
+
+    def blocks(self, task, block_rows):
+        import pyarrow.parquet as pq
+
+        group, start, stop = task
+        parquet = pq.ParquetFile(self.path, memory_map=True)
+        position = 0
+        for batch in parquet.iter_batches(batch_size=block_rows, row_groups=[group], columns=FEATURE_NAMES):
+            # Parquet cannot seek to a row inside a row group: batches before start are decoded and skipped
+            batch_start, position = position, position + batch.num_rows
+            if position <= start:
+                continue
+            if batch_start >= stop:
+                break
+            offset = max(start - batch_start, 0)
+            batch = batch.slice(offset, min(stop, position) - batch_start - offset)
+            # Nulls become NaN and are rejected by the bounds check
+            columns = [
+                batch.column(name).to_numpy(zero_copy_only=False).astype(np.float64)
+                for name in FEATURE_NAMES
+            ]
+            yield np.column_stack(columns), {}
+
+
+class LineInput:
+    """Line-oriented file split into byte ranges on line boundaries"""
+
+    def __init__(self, path, line_format, data_start=0):
+        self.path = path
+        self.size = os.path.getsize(path)
+        self.format = line_format
+        self.data_start = data_start
+        self.n_rows = None
+        self.ranges = None
+        self.range_rows = None
+
+    def byte_ranges(self, n_tasks):
+        """Split the data section into about n_tasks ranges that end after a newline"""
+        if self.size <= self.data_start:
+            return []
+        with open(self.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            cuts = [self.data_start]
+            for cut in _split(self.size - self.data_start, n_tasks)[1:-1]:
+                newline = mm.find(b"\n", self.data_start + cut)
+                if newline < 0:
+                    break
+                if newline + 1 > cuts[-1]:
+                    cuts.append(newline + 1)
+        cuts.append(self.size)
+        return [(start, stop) for start, stop in zip(cuts, cuts[1:]) if stop > start]
+
+    def lines(self, byte_range):
+        """Non-blank lines of a byte range, CSV_BLOCK_BYTES at a time"""
+        start, stop = byte_range
+        if start >= stop:
+            # Nothing to read (and empty files cannot be memory-mapped)
+            return
+        with open(self.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            position = start
+            while position < stop:
+                end = min(position + CSV_BLOCK_BYTES, stop)
+                if end < stop:
+                    end = mm.find(b"\n", end, stop) + 1 or stop
+                yield [line for line in mm[position:end].split(b"\n") if line.strip()]
+                position = end
+
+    def count_rows(self, byte_range):
+        return sum(len(lines) for lines in self.lines(byte_range))
+
+    def tasks(self, n_tasks):
+        # First rows come from count_rows(), run across the pool beforehand
+        first_rows = np.cumsum([0] + self.range_rows[:-1]).tolist()
+        return list(zip(first_rows, self.ranges))
+
+    def whole(self):
+        """Task covering the entire file, with n_rows counted"""
+        task = (self.data_start, self.size)
+        self.n_rows = self.count_rows(task)
+        return task
+
+    def blocks(self, task, block_rows):
+        buffer = np.empty((block_rows, N_FEATURES), dtype=np.float64)
+        for lines in self.lines(task):
+            for start in range(0, len(lines), block_rows):
+                chunk = lines[start:start + block_rows]
+                X = buffer[:len(chunk)]
+                errors = self.format.parse(chunk, X)
+                yield X, errors
+
+
+class CsvInput(LineInput):
+    """CSV with a header row naming the feature columns"""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            header = f.readline()
+            data_start = f.tell()
+        if not header.strip():
+            raise ValueError(f"{path} has no header row")
+        super().__init__(path, CsvFormat(), data_start)
+        self.format.read_header(header)
+
+
+class NdjsonInput(LineInput):
+    """One PatientData object or 8-number array per line"""
+
+    def __init__(self, path):
+        super().__init__(path, NdjsonFormat())
+
+
+def open_input(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".npy":
+        return NpyInput(path)
+    if extension in (".parquet", ".pq"):
+        return ParquetInput(path)
+    if extension == ".csv":
+        return CsvInput(path)
+    if extension in (".ndjson", ".jsonl"):
+        return NdjsonInput(path)
+    raise ValueError(f"Unsupported input {path!r}: expected .csv, .ndjson, .parquet or .npy")
+
+
+# Per-process state of pool workers
+_worker = {}
+
+
+def _init_worker(backend_name, source, output_path, output_format, block_rows, verify_rows):
+    from backends import create_backend
+
+    logging.basicConfig(level=logging.WARNING)
+    backend = create_backend(backend_name)
+    if not backend.load():
+        raise RuntimeError(f"{backend_name} backend failed to load in worker {os.getpid()}")
+    _worker.update(
+        backend=backend, source=source, output_path=output_path, output_format=output_format,
+        block_rows=block_rows, verify_rows=verify_rows, ready_at=time.time(),
+    )
+
+
+def _count_rows(byte_range):
+    return _worker["source"].count_rows(byte_range)
+
+
+def _verify(backend, X, probabilities, n_rows):
+    """Largest difference between block scoring and one-row-at-a-time scoring (the /predict path)"""
+    max_diff = 0.0
+    for i in range(min(n_rows, len(X))):
+        if probabilities[i] is not None:
+            single = float(backend.predict_batch(X[i:i + 1].copy())[0])
+            max_diff = max(max_diff, abs(single - probabilities[i]))
+    return max_diff
+
+
+def _score_task(indexed_task):
+    """Score one task; returns (task index, rows, rejected, max verify diff, worker ready time)"""
+    index, (first_row, task) = indexed_task
+    backend, source = _worker["backend"], _worker["source"]
+    out_format = FORMATS[_worker["output_format"]]() if _worker["output_format"] != "npy" else None
+    scorer = ChunkScorer(backend.predict_batch, None, out_format, ColumnarValidator(PatientData), chunk_rows=1)
+
+    if out_format is None:
+        output = np.load(_worker["output_path"], mmap_mode="r+")
+    else:
+        output = open(f"{_worker['output_path']}.part{index:06d}", "wb")
+
+    row = first_row
+    max_diff = None
+    try:
+        for X, errors in source.blocks(task, _worker["block_rows"]):
+            if max_diff is None and _worker["verify_rows"] > 0:
+                raw = X[:_worker["verify_rows"]].copy()
+            probabilities, errors = scorer.probabilities(X, errors)
+            if max_diff is None and _worker["verify_rows"] > 0:
+                max_diff = _verify(backend, raw, probabilities, _worker["verify_rows"])
+
+            if out_format is None:
+                output[row:row + len(probabilities)] = [np.nan if p is None else p for p in probabilities]
+            else:
+                output.write(out_format.format(row, probabilities, errors))
+            row += len(probabilities)
+    finally:
+        if out_format is None:
+            output.flush()
+            del output
+        else:
+            output.close()
+    return index, row - first_row, scorer.rows_rejected, max_diff, _worker["ready_at"]
+
+
+def score_file(input_path, output_path, backend_name, workers, block_rows=BLOCK_ROWS, verify_rows=8):
+    """Score input_path into output_path with a process pool; returns a summary dict"""
+    output_format = OUTPUT_FORMATS.get(os.path.splitext(output_path)[1].lower())
+    if output_format is None:
+        raise ValueError(f"Unsupported output {output_path!r}: expected one of {sorted(OUTPUT_FORMATS)}")
+    started = time.perf_counter()
+    source = open_input(input_path)
+
+    part_dir = None
+    if output_format != "npy":
+        part_dir = tempfile.mkdtemp(prefix=".bulk_score-", dir=os.path.dirname(output_path))
+    part_prefix = os.path.join(part_dir, "scores") if part_dir else output_path
+
+    # spawn: workers import NumPy/TensorFlow after the thread variables are set
+    context = multiprocessing.get_context("spawn")
+    initargs = (backend_name, source, part_prefix, output_format, block_rows, verify_rows)
+    rows = rejected = 0
+    max_diff = 0.0
+    ready_at = started_at = time.time()
+    try:
+        with context.Pool(workers, initializer=_init_worker, initargs=initargs) as pool:
+            n_tasks = workers * TASKS_PER_WORKER
+            if isinstance(source, LineInput):
+                source.ranges = source.byte_ranges(n_tasks)
+                source.range_rows = pool.map(_count_rows, source.ranges)
+                source.n_rows = sum(source.range_rows)
+            tasks = source.tasks(n_tasks)
+
+            if output_format == "npy":
+                np.lib.format.open_memmap(output_path, mode="w+", dtype=np.float64, shape=(source.n_rows,)).flush()
+            for _, task_rows, task_rejected, task_diff, worker_ready in pool.imap_unordered(
+                    _score_task, enumerate(tasks)):
+                rows += task_rows
+                rejected += task_rejected
+                max_diff = max(max_diff, task_diff or 0.0)
+                ready_at = max(ready_at, worker_ready)
+                print(f"  {rows:,}/{source.n_rows:,} rows", end="\r", file=sys.stderr, flush=True)
+
+        if part_dir is not None:
+            # Concatenate the per-task parts in task order
+            with open(output_path, "wb") as out:
+                out.write(FORMATS[output_format]().output_header())
+                for index in range(len(tasks)):
+                    part = f"{part_prefix}.part{index:06d}"
+                    with open(part, "rb") as f:
+                        shutil.copyfileobj(f, out, 1024 * 1024)
+    finally:
+        if part_dir is not None:
+            shutil.rmtree(part_dir, ignore_errors=True)
+
+    elapsed = time.perf_counter() - started
+    # From the moment the last worker finished loading the model
+    scoring_seconds = started_at + elapsed - ready_at
+    return {
+        "input": input_path,
+        "output": output_path,
+        "backend": backend_name,
+        "workers": workers,
+        "tasks": len(tasks),
+        "rows": rows,
+        "rejected": rejected,
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(rows / elapsed, 1) if elapsed > 0 else None,
+        "scoring_rows_per_second": round(rows / scoring_seconds, 1) if scoring_seconds > 0 else None,
+        "verify_max_diff": max_diff if verify_rows > 0 else None,
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Score a CSV/Parquet/.npy file with the diabetes model")
+    parser.add_argument("input", help="Input .csv (with header), .ndjson, .parquet or .npy (n x 8)")
+    parser.add_argument("output", help="Output .csv, .ndjson or .npy")
+    parser.add_argument("--backend", default=os.getenv("MODEL_BACKEND", "forest"),
+                        help="forest, sklearn (diabetes_model.joblib + scaler.joblib), keras, onnx or mlp")
+    parser.add_argument("--workers", type=int, default=available_cores(), help="Pool size (default: available cores)")
+    parser.add_argument("--block-rows", type=int, default=BLOCK_ROWS, help="Rows scored per backend call")
+    parser.add_argument("--model-dir", default=os.getcwd(), help="Directory holding the model files")
+    parser.add_argument("--verify-rows", type=int, default=8,
+                        help="Rows per task re-scored one at a time and compared (0 disables)")
+    parser.add_argument("--tolerance", type=float, default=0.0,
+                        help="Largest accepted verify difference; above it the exit status is 1 "
+                             "(use about 1e-6 for the float32 mlp/keras backends)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    input_path = os.path.abspath(args.input)
+    output_path = os.path.abspath(args.output)
+
+    # Each worker runs single-threaded kernels; parallelism comes from the pool
+    for name in NATIVE_THREAD_ENV_VARS:
+        os.environ.setdefault(name, "1")
+    # Backends load model files relative to the working directory
+    os.chdir(args.model_dir)
+
+    print(f"Scoring {input_path} with the {args.backend} backend on {args.workers} workers...")
+    summary = score_file(input_path, output_path, args.backend, args.workers, args.block_rows, args.verify_rows)
+
+    print(f"✓ Scored {summary['rows']:,} rows ({summary['rejected']:,} rejected) in {summary['seconds']:.2f} s")
+    print(f"  {summary['rows_per_second'] or 0:,.0f} rows/s overall, "
+          f"{summary['scoring_rows_per_second'] or 0:,.0f} rows/s after model load")
+    print(f"✓ Saved: {output_path}")
+    if summary["verify_max_diff"] is not None:
+        print(f"  Max difference vs one-row scoring (/predict path): {summary['verify_max_diff']:.3g}")
+        if summary["verify_max_diff"] > args.tolerance:
+            print(f"❌ Batch and one-row scoring differ by more than --tolerance {args.tolerance:g}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,329 @@
+"""
+Bulk and compact request bodies for /predict and /predict/batch.
+
+For high-volume internal callers, decoding JSON into eight named pydantic
+fields per patient (and encoding the response) costs more CPU than the
+model itself. Two compact encodings skip that work, picked by Content-Type and
+answered in the same encoding:
+
+- MessagePack (application/x-msgpack, needs the msgpack package): the JSON
+  API's objects, plus an 8-number array per patient and a bare list for
+  /predict/batch, and the same response objects.
+- Raw float32 (application/x-float32): N x 8 little-endian float32 values,
+  rows in FEATURE_NAMES order, no header. The body is viewed in place with
+  np.frombuffer; the response is N little-endian float32 probabilities, with
+  the model version in the X-Model-Version header.
+
+The routes read their body themselves (server.py's patient_body and
+patient_rows dependencies), so every encoding goes through the same
+middleware stack, CORS included. JSON bodies of /predict/batch take the
+same route as the compact ones, so a large batch is not turned into one
+PatientData model per patient. All of them are checked with one vectorized
+pass by validation.ColumnarValidator, and rejected with FastAPI's 422
+shape. A single JSON /predict body is validated into PatientData, as
+FastAPI would.
+"""
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
+from fastapi.openapi.models import Schema
+from pydantic import ValidationError
+from starlette.responses import Response
+from features import FEATURE_NAMES, N_FEATURES
+from schemas import BatchPredictionRequest
+import numpy as np
+import json
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    # Rust JSON parser shipped with pydantic >= 2.5; about 2.5x faster than json.loads
+    from pydantic_core import from_json
+except ImportError:
+    from_json = None
+
+JSON_TYPES = ("application/json",)
+MSGPACK_TYPES = ("application/x-msgpack", "application/msgpack", "application/vnd.msgpack")
+FLOAT32_TYPES = ("application/x-float32",)
+# Bytes per raw row: eight little-endian float32 values
+ROW_BYTES = N_FEATURES * 4
+
+# Request body content types documented in the OpenAPI schema, next to the JSON model
+OPENAPI_CONTENT = {
+    "application/x-msgpack": {
+        "schema": {"type": "string", "format": "binary"},
+    },
+    "application/x-float32": {
+        "schema": {"type": "string", "format": "binary"},
+        "example": f"N x {N_FEATURES} little-endian float32 values in {FEATURE_NAMES} order",
+    },
+}
+
+
+def openapi_request_body(model_cls):
+    """openapi_extra for a route reading its own body: model_cls as JSON, or a compact encoding"""
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {"schema": {"$ref": f"#/components/schemas/{model_cls.__name__}"}},
+                **OPENAPI_CONTENT,
+            },
+        },
+        # FastAPI only documents this for routes with a declared body model
+        "responses": {
+            "422": {
+                "description": "Validation Error",
+                "content": {"application/json": {"schema": {"$ref": "#/components/schemas/HTTPValidationError"}}},
+            }
+        },
+    }
+
+
+def add_model_schemas(openapi_schema, models):
+    """Register the models openapi_request_body refers to under components/schemas"""
+    schemas = openapi_schema.setdefault("components", {}).setdefault("schemas", {})
+    for model_cls in models:
+        schema = model_cls.model_json_schema(ref_template="#/components/schemas/{model}")
+        schema = {**schema.pop("$defs", {}), model_cls.__name__: schema}
+        for name, definition in schema.items():
+            # Same normalization as FastAPI's own components (e.g. bounds as floats)
+            schemas[name] = jsonable_encoder(Schema(**definition), by_alias=True, exclude_none=True)
+    return openapi_schema
+
+
+def _decode_error(msg, loc=("body",)):
+    return HTTPException(status_code=422, detail=[{"type": "value_error", "loc": list(loc), "msg": msg}])
+
+
+def _body_error(validation_error):
+    """FastAPI's 422 for a pydantic ValidationError of the whole request body"""
+    return RequestValidationError([{**error, "loc": ("body", *error["loc"])} for error in validation_error.errors()])
+
+
+def _empty_batch_error():
+    # patients has min_length=1; pydantic words the error, as for any other bad envelope
+    try:
+        BatchPredictionRequest.model_validate({"patients": []})
+    except ValidationError as e:
+        return _body_error(e)
+
+
+def _missing_body_error():
+    # What FastAPI answers for a required body that was not sent
+    error = ValidationError.from_exception_data("body", [{"type": "missing", "loc": ("body",), "input": None}])
+    return RequestValidationError(error.errors())
+
+
+class CompactFormat:
+    """Decodes a request body and encodes results"""
+
+    name = None
+    media_type = None
+
+    def decode(self, body, single):
+        """
+        The submitted rows: an (n, 8) array, or a list of decoded rows
+        (dicts or lists) for ColumnarValidator.to_array; one row if single
+        """
+        raise NotImplementedError
+
+    def prediction(self, payload):
+        """Response for /predict from its JSON payload"""
+        raise NotImplementedError
+
+    def predictions(self, probabilities, model_version):
+        """Response for /predict/batch"""
+        raise NotImplementedError
+
+
+class Float32Format(CompactFormat):
+    """N x 8 little-endian float32 in, N little-endian float32 probabilities out"""
+
+    name = "float32"
+    media_type = "application/x-float32"
+
+    def decode(self, body, single):
+        if not body or len(body) % ROW_BYTES:
+            raise _decode_error(
+                f"Body must be N x {N_FEATURES} little-endian float32 values "
+                f"({ROW_BYTES} bytes per row), got {len(body)} bytes"
+            )
+        # Read-only view of the body: no copy until the checked rows go to the model
+        X = np.frombuffer(body, dtype="<f4").reshape(-1, N_FEATURES)
+        if single and len(X) != 1:
+            raise _decode_error(f"/predict takes exactly one row ({ROW_BYTES} bytes), got {len(X)}")
+        return X
+
+    def _response(self, probabilities, model_version):
+        return Response(
+            content=np.asarray(probabilities, dtype="<f4").tobytes(),
+            media_type=self.media_type,
+            headers={"X-Model-Version": str(model_version)}
+        )
+
+    def prediction(self, payload):
+        return self._response([payload["probability"]], payload["model_version"])
+
+    def predictions(self, probabilities, model_version):
+        return self._response(probabilities, model_version)
+
+
+class ObjectFormat(CompactFormat):
+    """Bodies with the JSON API's objects, in some serialization"""
+
+    # Also accept 8-number arrays as patients, and a bare list of patients for a batch
+    array_rows = True
+
+    def loads(self, body):
+        raise NotImplementedError
+
+    def dumps(self, payload):
+        raise NotImplementedError
+
+    def decode(self, body, single):
+        data = self.loads(body)
+        if single:
+            return [data]
+        if isinstance(data, dict) and isinstance(data.get("patients"), list):
+            return data["patients"]
+        if self.array_rows and isinstance(data, list):
+            return data
+        # Bad envelope: cheap to validate, as it fails before any patient is checked
+        try:
+            BatchPredictionRequest.model_validate(data, from_attributes=True)
+        except ValidationError as e:
+            raise _body_error(e)
+        raise _decode_error('Body must be {"patients": [...]}')
+
+    def _response(self, payload):
+        return Response(
+            content=self.dumps(payload),
+            media_type=self.media_type,
+            headers={"X-Model-Version": str(payload["model_version"])}
+        )
+
+    def prediction(self, payload):
+        return self._response(payload)
+
+    def predictions(self, probabilities, model_version):
+        predictions = []
+        for probability in np.asarray(probabilities, dtype=np.float64).tolist():
+            # Same threshold as /predict
+            prediction = 1 if probability >= 0.5 else 0
+            predictions.append({
+                "prediction": prediction,
+                "probability": probability,
+                "predicted_outcome": "Diabetes" if prediction == 1 else "No Diabetes"
+            })
+        return self._response({
+            "count": len(predictions),
+            "predictions": predictions,
+            "model_version": model_version
+        })
+
+
+class JsonFormat(ObjectFormat):
+    """JSON, validated column-wise instead of through BatchPredictionRequest"""
+
+    name = "json"
+    media_type = "application/json"
+    # Exactly the documented PatientData / BatchPredictionRequest bodies
+    array_rows = False
+
+    def loads(self, body):
+        if not body:
+            raise _missing_body_error()
+        if from_json is not None:
+            try:
+                return from_json(body)
+            except ValueError:
+                # json.loads below reports the position, as FastAPI does
+                pass
+        try:
+            return json.loads(body)
+        except json.JSONDecodeError as e:
+            # Same error as FastAPI's own JSON body parsing
+            raise HTTPException(status_code=422, detail=[{
+                "type": "json_invalid", "loc": ["body", e.pos], "msg": "JSON decode error",
+                "input": {}, "ctx": {"error": e.msg}
+            }])
+        except UnicodeDecodeError:
+            raise _decode_error("Body is not valid UTF-8")
+
+    def dumps(self, payload):
+        return json.dumps(payload, separators=(",", ":")).encode()
+
+
+class MsgpackFormat(ObjectFormat):
+    """MessagePack with the same objects as the JSON API"""
+
+    name = "msgpack"
+    media_type = "application/x-msgpack"
+
+    def loads(self, body):
+        try:
+            return msgpack.unpackb(body)
+        except Exception as e:
+            raise _decode_error(f"Invalid MessagePack body: {type(e).__name__}")
+
+    def dumps(self, payload):
+        return msgpack.packb(payload)
+
+
+def read_rows(body_format, body, single, validator, max_rows=None):
+    """
+    Decoded rows checked by a ColumnarValidator, as a writable float64
+    (n, 8) array; 422 for an empty batch or invalid rows, 413 for more than max_rows
+    """
+    rows = body_format.decode(body, single)
+    if not len(rows):
+        raise _empty_batch_error()
+    if max_rows is not None and len(rows) > max_rows:
+        raise HTTPException(status_code=413, detail=f"Batch too large: {len(rows)} > {max_rows} patients")
+
+    array_rows = getattr(body_format, "array_rows", True)
+    if isinstance(rows, np.ndarray):
+        X, rows = rows, None
+    else:
+        X = validator.to_array(rows, array_rows)
+    loc = ("body",) if single else ("body", "patients")
+    errors = validator.errors(X, rows, loc=loc, indexed=not single, array_rows=array_rows)
+    if errors:
+        raise HTTPException(status_code=422, detail=errors)
+    # float32 bodies are converted here, once, for the scaler and model
+    return X.astype(np.float64, copy=False)
+
+
+def read_model(body_format, body, model_cls):
+    """One decoded object validated into model_cls, with FastAPI's 422 errors"""
+    data = body_format.loads(body)
+    try:
+        # from_attributes like FastAPI's own body validation, so messages match
+        return model_cls.model_validate(data, from_attributes=True)
+    except ValidationError as e:
+        raise _body_error(e)
+
+
+def compact_format(content_type):
+    """
+    CompactFormat for a request Content-Type: JSON (also when none is given),
+    MessagePack or raw float32; 415 for anything else
+    """
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    if not media_type or media_type in JSON_TYPES or media_type.endswith("+json"):
+        return JsonFormat()
+    if media_type in FLOAT32_TYPES:
+        return Float32Format()
+    if media_type in MSGPACK_TYPES:
+        if msgpack is None:
+            raise HTTPException(status_code=415, detail="MessagePack bodies need the msgpack package installed")
+        return MsgpackFormat()
+    raise HTTPException(
+        status_code=415,
+        detail=f"Content-Type must be one of {list(JSON_TYPES + MSGPACK_TYPES + FLOAT32_TYPES)}, got {media_type!r}"
+    )
+
@@ -0,0 +1,247 @@
+"""
+Bounded inference executor and native thread pinning.
+
+Sync endpoints run on Starlette's anyio threadpool (40 threads), so under
+load 40 requests can be inside NumPy/TensorFlow/ONNX Runtime at once, each
+of which may start its own BLAS/OpenMP or intra-op threads, and the CPU is
+oversubscribed many times over. Instead, the prediction endpoints are async
+and hand their compute to an InferenceExecutor:
+
+- INFERENCE_THREADS threads (default: available cores / NATIVE_THREADS) do
+  all scoring work, pulling from one priority queue. /predict and
+  /predict/batch are interactive work; /predict/stream chunks and job chunks
+  are background work, taken only when no interactive work is waiting and
+  split into INFERENCE_BACKGROUND_SLICE_ROWS-row items, so an interactive
+  call waits for at most one slice.
+- Admission control: at most INFERENCE_MAX_PENDING interactive calls may be
+  queued or running. Beyond that a request gets an immediate 429 with
+  Retry-After instead of joining a queue it cannot get through in time, and
+  work that waited longer than INFERENCE_QUEUE_TIMEOUT_MS is dropped with a
+  503 before it runs (its client has most likely given up).
+- Native libraries are limited to NATIVE_THREADS threads per call: the
+  *_NUM_THREADS variables are set for libraries loaded later, BLAS/OpenMP
+  pools already loaded are resized with threadpoolctl (installed with
+  scikit-learn), sklearn estimators get n_jobs=NATIVE_THREADS, and the
+  TensorFlow and ONNX Runtime thread pools default to NATIVE_THREADS.
+
+So a worker process runs about INFERENCE_THREADS * NATIVE_THREADS compute
+threads (plus the micro-batcher thread when batching is on), not one pool
+per request per library.
+"""
+from concurrent.futures import Future
+from contextlib import contextmanager
+from fastapi import HTTPException
+import numpy as np
+import asyncio
+import functools
+import itertools
+import logging
+import os
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Environment variables read by BLAS/OpenMP runtimes and by our TF/ONNX config
+NATIVE_THREAD_ENV_VARS = (
+    "OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS",
+    "TF_INTRA_OP_THREADS", "TF_INTER_OP_THREADS", "ONNX_INTRA_OP_THREADS",
+)
+
+INTERACTIVE = 0
+BACKGROUND = 1
+
+
+def available_cores():
+    """CPUs this process may run on (respects taskset/cgroup affinity)"""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+# Threads each native library may use inside one inference call
+NATIVE_THREADS = max(1, int(os.getenv("NATIVE_THREADS", "1")))
+# 0 = available cores / NATIVE_THREADS
+INFERENCE_THREADS = int(os.getenv("INFERENCE_THREADS", "0")) or max(1, available_cores() // NATIVE_THREADS)
+# Interactive calls queued or running before new ones get a 429 (0 = 64 per thread)
+INFERENCE_MAX_PENDING = int(os.getenv("INFERENCE_MAX_PENDING", "0")) or 64 * INFERENCE_THREADS
+# Rows per background work item (stream and job chunks are split into these)
+INFERENCE_BACKGROUND_SLICE_ROWS = int(os.getenv("INFERENCE_BACKGROUND_SLICE_ROWS", "256"))
+# Interactive work that waited longer than this is answered with a 503 (0 disables)
+INFERENCE_QUEUE_TIMEOUT_MS = float(os.getenv("INFERENCE_QUEUE_TIMEOUT_MS", "1000"))
+
+
+def limit_native_threads(*models, threads=NATIVE_THREADS):
+    """
+    Cap BLAS/OpenMP pools at `threads` and set n_jobs on sklearn estimators;
+    call after the backend is loaded so runtimes it pulled in are covered
+    """
+    for name in NATIVE_THREAD_ENV_VARS:
+        os.environ.setdefault(name, str(threads))
+
+    limited = []
+    try:
+        from threadpoolctl import threadpool_info, threadpool_limits
+        threadpool_limits(limits=threads)
+        limited = sorted({pool["internal_api"] for pool in threadpool_info()})
+    except ImportError:
+        logger.warning("threadpoolctl not installed; BLAS/OpenMP pools sized by *_NUM_THREADS only")
+
+    for model in models:
+        # RandomForest defaults to n_jobs=-1: one joblib thread per core on every call
+        if getattr(model, "n_jobs", None) not in (None, threads):
+            model.n_jobs = threads
+
+    logger.info(
+        f"✓ Native threads limited to {threads} per call"
+        + (f" ({', '.join(limited)})" if limited else "")
+    )
+
+
+class InferenceExecutor:
+    """Fixed pool of inference threads with admission control for interactive work"""
+
+    def __init__(self, threads=INFERENCE_THREADS, max_pending=INFERENCE_MAX_PENDING,
+                 queue_timeout_ms=INFERENCE_QUEUE_TIMEOUT_MS):
+        self.threads = max(1, int(threads))
+        self.max_pending = max(1, int(max_pending))
+        self.queue_timeout = queue_timeout_ms / 1000
+        self._queue = queue.PriorityQueue()
+        # Ties within a priority are served first in, first out
+        self._seq = itertools.count()
+        self._threads = []
+        self._lock = threading.Lock()
+
+        # Stats
+        self._pending = 0
+        self._max_pending_seen = 0
+        self._completed = 0
+        self._rejected = 0
+        self._expired = 0
+        self._wait_seconds = 0.0
+
+    def start(self):
+        """Start the inference threads"""
+        if self._threads:
+            return
+        for i in range(self.threads):
+            thread = threading.Thread(target=self._run, name=f"inference-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info(
+            f"✓ Inference executor started ({self.threads} threads, "
+            f"max_pending={self.max_pending}, queue_timeout_ms={self.queue_timeout * 1000:.0f})"
+        )
+
+    def stop(self):
+        """Let the threads finish queued work and exit"""
+        for _ in self._threads:
+            # Sorts after every real item
+            self._queue.put((BACKGROUND + 1, next(self._seq), None))
+        self._threads = []
+
+    @contextmanager
+    def admission(self):
+        """Count one interactive call against max_pending, or raise 429 if full"""
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._rejected += 1
+                raise HTTPException(
+                    status_code=429,
+                    detail=f"Server busy: {self._pending} predictions already queued or running",
+                    headers={"Retry-After": "1"}
+                )
+            self._pending += 1
+            if self._pending > self._max_pending_seen:
+                self._max_pending_seen = self._pending
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def submit(self, fn, *args, priority=INTERACTIVE, **kwargs):
+        """Queue fn(*args, **kwargs) and return a concurrent.futures.Future"""
+        if not self._threads:
+            raise RuntimeError("Inference executor is not running")
+        future = Future()
+        self._queue.put((priority, next(self._seq), (time.perf_counter(), future, fn, args, kwargs)))
+        return future
+
+    async def run(self, fn, *args, **kwargs):
+        """Run interactive work on an inference thread; 429 when saturated, 503 when it waited too long"""
+        with self.admission():
+            return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def call_background(self, fn, *args, **kwargs):
+        """Run background work (no admission limit) once no interactive work is waiting; blocks"""
+        return self.submit(fn, *args, priority=BACKGROUND, **kwargs).result()
+
+    def background(self, predict_fn, slice_rows=INFERENCE_BACKGROUND_SLICE_ROWS):
+        """
+        predict_fn(X) wrapped to run as background work from a non-async
+        thread, slice_rows rows per work item so interactive calls never wait
+        behind a whole chunk
+        """
+        @functools.wraps(predict_fn)
+        def wrapper(X):
+            if len(X) <= slice_rows:
+                return self.call_background(predict_fn, X)
+            return np.concatenate([
+                self.call_background(predict_fn, X[start:start + slice_rows])
+                for start in range(0, len(X), slice_rows)
+            ])
+        return wrapper
+
+    def _run(self):
+        while True:
+            priority, _, item = self._queue.get()
+            if item is None:
+                break
+            queued_at, future, fn, args, kwargs = item
+            # Cancelled while queued (e.g. the client disconnected)
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            waited = time.perf_counter() - queued_at
+            if priority == INTERACTIVE and self.queue_timeout > 0 and waited > self.queue_timeout:
+                with self._lock:
+                    self._expired += 1
+                future.set_exception(HTTPException(
+                    status_code=503,
+                    detail=f"Server busy: prediction waited {waited * 1000:.0f} ms for an inference thread",
+                    headers={"Retry-After": "1"}
+                ))
+                continue
+
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException as e:
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+            with self._lock:
+                self._completed += 1
+                self._wait_seconds += waited
+
+    @property
+    def pending(self):
+        return self._pending
+
+    def stats(self):
+        """Pool size, queue depth and admission counters"""
+        with self._lock:
+            return {
+                "threads": self.threads,
+                "native_threads": NATIVE_THREADS,
+                "max_pending": self.max_pending,
+                "queue_timeout_ms": self.queue_timeout * 1000,
+                "pending": self._pending,
+                "max_pending_seen": self._max_pending_seen,
+                "queue_depth": self._queue.qsize(),
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "expired": self._expired,
+                "mean_wait_ms": self._wait_seconds / self._completed * 1000 if self._completed else 0.0,
+            }
@@ -0,0 +1,118 @@
+"""
+Feature layout shared by the prediction servers.
+
+The scaler and models are trained on the eight PatientData fields in a fixed
+order. Feature names are checked once when the artifacts are loaded; after
+that, requests are copied straight into a reused NumPy buffer instead of going
+through a one-row pandas DataFrame.
+"""
+from operator import attrgetter
+import numpy as np
+import copy
+import os
+import threading
+
+# Column order the scaler and model were trained on
+FEATURE_NAMES = [
+    "Pregnancies",
+    "Glucose",
+    "BloodPressure",
+    "SkinThickness",
+    "Insulin",
+    "BMI",
+    "DiabetesPedigreeFunction",
+    "Age",
+]
+N_FEATURES = len(FEATURE_NAMES)
+
+# "numpy" (fast path) or "dataframe" (original pd.DataFrame path, kept for A/B runs)
+INPUT_PATH = os.getenv("INPUT_PATH", "numpy").lower()
+
+_get_features = attrgetter(*FEATURE_NAMES)
+
+
+def check_feature_names(estimator, label="estimator"):
+    """
+    Verify that a fitted estimator expects FEATURE_NAMES, in order.
+
+    Returns a shallow copy without `feature_names_in_`, so NumPy input does
+    not repeat sklearn's feature-name check on every call. Raises ValueError
+    if the estimator was fitted on a different layout.
+    """
+    n_features = getattr(estimator, "n_features_in_", N_FEATURES)
+    if n_features != N_FEATURES:
+        raise ValueError(f"{label} expects {n_features} features, not {N_FEATURES}")
+
+    names = getattr(estimator, "feature_names_in_", None)
+    if names is None:
+        return estimator
+    if list(names) != FEATURE_NAMES:
+        raise ValueError(f"{label} was fitted on columns {list(names)}, expected {FEATURE_NAMES}")
+
+    stripped = copy.copy(estimator)
+    del stripped.feature_names_in_
+    return stripped
+
+
+def features_to_array(patients):
+    """Pack PatientData objects into one contiguous (n, 8) float64 array"""
+    return np.array([_get_features(p) for p in patients], dtype=np.float64)
+
+
+class RowBuffer:
+    """Per-thread (1, 8) float64 buffer reused across requests"""
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def fill(self, data):
+        """Copy one PatientData into this thread's buffer and return it"""
+        buffer = getattr(self._local, "buffer", None)
+        if buffer is None:
+            buffer = self._local.buffer = np.empty((1, N_FEATURES), dtype=np.float64)
+        buffer[0] = _get_features(data)
+        return buffer
+
+
+def field_bounds(model_cls):
+    """
+    {field: (min, max, is_int)} from a pydantic model's Field(ge=..., le=...)
+    constraints, in FEATURE_NAMES order
+    """
+    bounds = {}
+    for name in FEATURE_NAMES:
+        field = model_cls.model_fields[name]
+        low = high = None
+        for constraint in field.metadata:
+            low = getattr(constraint, "ge", low)
+            high = getattr(constraint, "le", high)
+        bounds[name] = (low, high, field.annotation is int)
+    return bounds
+
+
+def sample_features(bounds, n_rows, seed=0):
+    """Random (n, 8) float64 rows drawn uniformly inside the field bounds"""
+    rng = np.random.default_rng(seed)
+    columns = []
+    for name in FEATURE_NAMES:
+        low, high, is_int = bounds[name]
+        if is_int:
+            columns.append(rng.integers(low, high, endpoint=True, size=n_rows).astype(np.float64))
+        else:
+            columns.append(rng.uniform(low, high, size=n_rows))
+    return np.ascontiguousarray(np.column_stack(columns))
+
+
+def bound_arrays(bounds):
+    """(low, high, is_int) arrays in FEATURE_NAMES order for vectorized checks"""
+    low = np.array([bounds[name][0] for name in FEATURE_NAMES], dtype=np.float64)
+    high = np.array([bounds[name][1] for name in FEATURE_NAMES], dtype=np.float64)
+    is_int = np.array([bounds[name][2] for name in FEATURE_NAMES], dtype=bool)
+    return low, high, is_int
+
+
+def invalid_features(X, low, high, is_int):
+    """(n, 8) mask of values outside their bounds, NaN, or fractional in int fields"""
+    invalid = ~((X >= low) & (X <= high))
+    invalid |= is_int & (X != np.floor(X))
+    return invalid
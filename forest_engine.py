@@ -0,0 +1,167 @@
+"""
+Compiled inference for the RandomForestClassifier.
+
+sklearn's predict_proba validates its input, dispatches every tree through
+joblib (n_jobs=-1) and allocates per-tree outputs, which dominates latency
+for the small batches the API sees. At load time this module flattens every
+tree into shared contiguous arrays (feature, threshold, children, leaf
+value) and then walks all trees for all rows at once with a handful of
+vectorized NumPy operations per depth level.
+
+Results are bit-identical to predict_proba: inputs are compared in float32
+like sklearn's tree code, leaf values are normalized the same way, and tree
+outputs are accumulated in estimator order before dividing by the number of
+trees. A parity check runs at load time and falls back to sklearn on any
+mismatch.
+"""
+import numpy as np
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# "compiled" (flattened tree arrays) or "sklearn" (model.predict_proba)
+FOREST_ENGINE = os.getenv("FOREST_ENGINE", "compiled").lower()
+
+PARITY_ROWS = 512
+
+# Arrays written by CompiledForest.save and memory-mapped by CompiledForest.load
+ARRAY_NAMES = ("feature", "threshold", "children", "value", "roots")
+
+
+class CompiledForest:
+    """Flattened RandomForestClassifier with a drop-in predict_proba"""
+
+    def __init__(self, forest):
+        self.classes_ = forest.classes_
+        self.n_features_in_ = forest.n_features_in_
+        self.n_trees = len(forest.estimators_)
+
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            n_nodes = tree.node_count
+            left = tree.children_left.astype(np.intp)
+            right = tree.children_right.astype(np.intp)
+            is_leaf = left == -1
+
+            # Leaves point to themselves, so extra iterations past a leaf are no-ops
+            node_ids = np.arange(n_nodes, dtype=np.intp)
+            left = np.where(is_leaf, node_ids, left) + offset
+            right = np.where(is_leaf, node_ids, right) + offset
+            feature = np.where(is_leaf, 0, tree.feature).astype(np.intp)
+            threshold = np.where(is_leaf, 0.0, tree.threshold)
+
+            # Same normalization as DecisionTreeClassifier.predict_proba
+            value = tree.value[:, 0, :].astype(np.float64)
+            normalizer = value.sum(axis=1)[:, np.newaxis]
+            normalizer[normalizer == 0.0] = 1.0
+            value = value / normalizer
+
+            features.append(feature)
+            thresholds.append(threshold)
+            lefts.append(left)
+            rights.append(right)
+            values.append(value)
+            roots.append(offset)
+            offset += n_nodes
+            max_depth = max(max_depth, tree.max_depth)
+
+        self.feature = np.ascontiguousarray(np.concatenate(features))
+        self.threshold = np.ascontiguousarray(np.concatenate(thresholds))
+        # Children interleaved as [right, left] so the next node is one gather:
+        # children[2 * node + go_left]
+        self.children = np.empty(2 * offset, dtype=np.intp)
+        self.children[0::2] = np.concatenate(rights)
+        self.children[1::2] = np.concatenate(lefts)
+        self.value = np.ascontiguousarray(np.concatenate(values))
+        self.roots = np.array(roots, dtype=np.intp)
+        self.max_depth = max_depth
+        self.n_nodes = offset
+
+    def save(self, directory):
+        """Write the flattened arrays as uncompressed .npy files plus meta.json"""
+        os.makedirs(directory, exist_ok=True)
+        for name in ARRAY_NAMES:
+            np.save(os.path.join(directory, f"{name}.npy"), getattr(self, name), allow_pickle=False)
+        meta = {
+            "n_trees": self.n_trees,
+            "n_nodes": self.n_nodes,
+            "max_depth": self.max_depth,
+            "n_features_in": int(self.n_features_in_),
+            "classes": [int(c) for c in self.classes_],
+        }
+        with open(os.path.join(directory, "meta.json"), "w") as f:
+            json.dump(meta, f, indent=2)
+
+    @classmethod
+    def load(cls, directory, mmap_mode="r"):
+        """
+        Load arrays written by save().
+
+        With mmap_mode="r" the arrays are read-only views of the page cache,
+        so every worker process serving the same files shares one physical copy.
+        """
+        with open(os.path.join(directory, "meta.json")) as f:
+            meta = json.load(f)
+        forest = cls.__new__(cls)
+        for name in ARRAY_NAMES:
+            path = os.path.join(directory, f"{name}.npy")
+            setattr(forest, name, np.load(path, mmap_mode=mmap_mode, allow_pickle=False))
+        forest.n_trees = meta["n_trees"]
+        forest.n_nodes = meta["n_nodes"]
+        forest.max_depth = meta["max_depth"]
+        forest.n_features_in_ = meta["n_features_in"]
+        forest.classes_ = np.array(meta["classes"])
+        return forest
+
+    def apply(self, X):
+        """Global leaf index reached by every row in every tree, shape (n, n_trees)"""
+        # sklearn casts inputs to float32 before comparing against thresholds
+        X32 = np.ascontiguousarray(X, dtype=np.float32)
+        n_rows, n_features = X32.shape
+        flat = X32.ravel()
+        row_offset = (np.arange(n_rows, dtype=np.intp) * n_features)[:, np.newaxis]
+        node = np.broadcast_to(self.roots, (n_rows, self.n_trees))
+        for _ in range(self.max_depth):
+            go_left = flat[row_offset + self.feature[node]] <= self.threshold[node]
+            node = self.children[2 * node + go_left]
+        return node
+
+    def predict_proba(self, X):
+        """Class probabilities, identical to RandomForestClassifier.predict_proba"""
+        leaves = self.apply(X)
+        # cumsum adds tree outputs strictly in estimator order, as sklearn does
+        # (a plain sum() would use pairwise summation and round differently)
+        proba = np.cumsum(self.value[leaves], axis=1)[:, -1]
+        proba /= self.n_trees
+        return proba
+
+
+def check_forest_parity(forest, compiled, n_rows=PARITY_ROWS, seed=0):
+    """True if the compiled forest reproduces predict_proba exactly on scaled sample rows"""
+    rng = np.random.default_rng(seed)
+    rows = rng.normal(0.0, 1.5, size=(n_rows, forest.n_features_in_))
+    return np.array_equal(forest.predict_proba(rows), compiled.predict_proba(rows))
+
+
+def select_forest(forest):
+    """Compiled forest if FOREST_ENGINE allows it and it matches sklearn, else `forest`"""
+    if FOREST_ENGINE != "compiled":
+        return forest
+    try:
+        compiled = CompiledForest(forest)
+    except Exception as e:
+        logger.warning(f"Could not compile forest: {type(e).__name__}: {e}")
+        return forest
+    if not check_forest_parity(forest, compiled):
+        logger.warning("Compiled forest does not match predict_proba, using sklearn engine")
+        return forest
+    logger.info(
+        f"✓ Forest compiled ({compiled.n_trees} trees, {compiled.n_nodes} nodes, "
+        f"depth {compiled.max_depth}, parity check passed)"
+    )
+    return compiled
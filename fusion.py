@@ -0,0 +1,131 @@
+"""
+Fold the StandardScaler into the serving path.
+
+sklearn's StandardScaler.transform validates its input and allocates a new
+array on every call. In "fused" mode the scaler's mean_/scale_ are read once
+at startup and applied in place with two NumPy operations (the same ones
+sklearn performs, so results are bit-identical). For the Keras network the
+affine transform is folded into the first Dense layer's kernel and bias, so
+raw features go straight into the model.
+
+Every fused path is compared against the original scaler/model at startup;
+if the parity check fails, the server falls back to plain sklearn scaling.
+"""
+import numpy as np
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# "fused" (precomputed affine transform) or "sklearn" (scaler.transform per call)
+SCALER_MODE = os.getenv("SCALER_MODE", "fused").lower()
+
+PARITY_ROWS = 256
+KERAS_PARITY_ATOL = 1e-5
+
+
+class FusedScaler:
+    """StandardScaler applied as an in-place (X - mean) / scale"""
+
+    def __init__(self, scaler):
+        n_features = scaler.n_features_in_
+        if getattr(scaler, "with_mean", True):
+            self.mean = np.array(scaler.mean_, dtype=np.float64)
+        else:
+            self.mean = np.zeros(n_features)
+        if getattr(scaler, "with_std", True):
+            self.scale = np.array(scaler.scale_, dtype=np.float64)
+        else:
+            self.scale = np.ones(n_features)
+
+    @classmethod
+    def from_arrays(cls, mean, scale):
+        """Build from precomputed mean/scale arrays (e.g. memory-mapped .npy files)"""
+        fused = cls.__new__(cls)
+        fused.mean = mean
+        fused.scale = scale
+        return fused
+
+    def transform(self, X):
+        """Scale a float64 array in place and return it"""
+        X -= self.mean
+        X /= self.scale
+        return X
+
+
+def sample_rows(scaler, n_rows=PARITY_ROWS, seed=0):
+    """Random raw feature rows spread around the scaler's training distribution"""
+    fused = FusedScaler(scaler)
+    rng = np.random.default_rng(seed)
+    return rng.normal(fused.mean, 3 * fused.scale, size=(n_rows, len(fused.mean)))
+
+
+def check_scaler_parity(scaler, fused):
+    """True if the fused scaler reproduces scaler.transform exactly"""
+    rows = sample_rows(scaler)
+    expected = scaler.transform(rows)
+    actual = fused.transform(rows.copy())
+    return np.array_equal(expected, actual)
+
+
+def fold_scaler_into_keras(model, scaler):
+    """Return a copy of a Keras model whose first Dense layer absorbs the scaler"""
+    import tensorflow as tf
+
+    first = model.layers[0]
+    if not isinstance(first, tf.keras.layers.Dense):
+        raise ValueError(f"First layer is {type(first).__name__}, not Dense")
+
+    folded = tf.keras.models.clone_model(model)
+    folded.set_weights(model.get_weights())
+
+    # (x - mean) / scale @ W + b  ==  x @ (W / scale) + (b - (mean / scale) @ W)
+    fused = FusedScaler(scaler)
+    kernel, bias = first.get_weights()
+    kernel64 = kernel.astype(np.float64)
+    new_kernel = kernel64 / fused.scale[:, None]
+    new_bias = bias.astype(np.float64) - (fused.mean / fused.scale) @ kernel64
+    folded.layers[0].set_weights([new_kernel.astype(kernel.dtype), new_bias.astype(bias.dtype)])
+    return folded
+
+
+def check_keras_parity(model, folded, scaler):
+    """Max absolute difference between scaler+model and the folded model"""
+    rows = sample_rows(scaler)
+    expected = model.predict(scaler.transform(rows), batch_size=len(rows), verbose=0)
+    actual = folded.predict(rows, batch_size=len(rows), verbose=0)
+    return float(np.max(np.abs(expected - actual)))
+
+
+def select_scaler(scaler):
+    """Fused scaler if SCALER_MODE allows it and it matches sklearn, else `scaler`"""
+    if SCALER_MODE != "fused":
+        return scaler
+    fused = FusedScaler(scaler)
+    if not check_scaler_parity(scaler, fused):
+        logger.warning("Fused scaler does not match scaler.transform, using sklearn scaling")
+        return scaler
+    logger.info("✓ Scaler fused into an in-place affine transform (parity check passed)")
+    return fused
+
+
+def select_keras_model(model, scaler):
+    """
+    Return (serving_model, folded).
+
+    `folded` is True when the scaler was folded into the model's first layer,
+    in which case raw features must be passed to the model unscaled.
+    """
+    if SCALER_MODE != "fused":
+        return model, False
+    try:
+        folded = fold_scaler_into_keras(model, scaler)
+        max_diff = check_keras_parity(model, folded, scaler)
+    except Exception as e:
+        logger.warning(f"Could not fold scaler into model: {type(e).__name__}: {e}")
+        return model, False
+    if max_diff > KERAS_PARITY_ATOL:
+        logger.warning(f"Folded model differs by {max_diff:.2e} (> {KERAS_PARITY_ATOL}), using sklearn scaling")
+        return model, False
+    logger.info(f"✓ Scaler folded into first Dense layer (max parity diff {max_diff:.2e})")
+    return folded, True
@@ -0,0 +1,203 @@
+"""
+Hot model reload.
+
+Replacing the model used to mean a container restart and a full cold start.
+POST /admin/reload (or the file watcher) now loads a fresh backend instance
+from the files on disk in a background thread, warms it up like a startup
+load, and only then swaps it in. Requests keep being served by the old
+backend meanwhile, and requests that already started finish on it: handlers
+read the active backend once and pass it down, and the swap itself runs on
+the event loop between two handler steps. A backend that fails to load (or
+fails its parity checks) is discarded and the old one keeps serving.
+
+The watcher polls the files the active backend was loaded from (mtime and
+size) every MODEL_WATCH_SECONDS and reloads once a change has been stable
+for one full interval, so a file that is still being copied is not loaded
+half-written. Files that fail to load are not retried until they change
+again.
+"""
+import concurrent.futures
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Poll interval of the model file watcher (0 disables it)
+MODEL_WATCH_SECONDS = float(os.getenv("MODEL_WATCH_SECONDS", "0"))
+
+
+class ReloadInProgress(Exception):
+    pass
+
+
+def file_signature(paths):
+    """(path, mtime_ns, size) of every file under paths; missing paths count as (path, None, None)"""
+    signature = []
+    for path in paths:
+        if os.path.isdir(path):
+            for directory, _, files in sorted(os.walk(path)):
+                for name in sorted(files):
+                    file_path = os.path.join(directory, name)
+                    try:
+                        stat = os.stat(file_path)
+                    except OSError:
+                        continue
+                    signature.append((file_path, stat.st_mtime_ns, stat.st_size))
+        else:
+            try:
+                stat = os.stat(path)
+                signature.append((path, stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                signature.append((path, None, None))
+    return tuple(signature)
+
+
+class ModelReloader:
+    """
+    Loads a replacement backend in the background and swaps it in.
+
+    load_fn() returns a loaded, warmed-up backend or None; swap_fn(backend)
+    makes it the active one and returns a cleanup callable (or None) that is
+    run afterwards; current_fn() returns the active backend.
+    """
+
+    def __init__(self, load_fn, swap_fn, current_fn, watch_seconds=MODEL_WATCH_SECONDS):
+        self.load_fn = load_fn
+        self.swap_fn = swap_fn
+        self.current_fn = current_fn
+        self.watch_seconds = watch_seconds
+        self.loop = None
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        self._watcher = None
+        # Files as they were when the active backend (or the last attempt) was loaded
+        self._loaded_signature = None
+        self._changed_signature = None
+
+        self.state = "idle"
+        self.reloads = 0
+        self.failures = 0
+        self.last = None
+
+    def start(self, loop=None):
+        """Remember the event loop for swaps and start the file watcher if enabled"""
+        self.loop = loop
+        if self.watch_seconds > 0:
+            self._watcher = threading.Thread(target=self._watch, name="model-watcher", daemon=True)
+            self._watcher.start()
+            logger.info(f"✓ Model file watcher started (every {self.watch_seconds:g} s)")
+
+    def stop(self):
+        self._stop.set()
+
+    def mark_loaded(self):
+        """Record the files behind the active backend; call after a startup load"""
+        self._loaded_signature = file_signature(self.current_fn().watch_paths())
+
+    def request(self, trigger="admin", force=False):
+        """Start a reload in the background; raises ReloadInProgress if one is running"""
+        with self._lock:
+            if self.state == "loading":
+                raise ReloadInProgress("A model reload is already in progress")
+            self.state = "loading"
+            self.last = {
+                "trigger": trigger,
+                "state": "loading",
+                "from_version": self.current_fn().version,
+                "to_version": None,
+                "started_at": time.time(),
+                "finished_at": None,
+                "load_seconds": None,
+                "error": None,
+            }
+            self._thread = threading.Thread(
+                target=self._reload, args=(self.last, force), name="model-reload", daemon=True
+            )
+            self._thread.start()
+            return dict(self.last)
+
+    def _reload(self, record, force):
+        started = time.perf_counter()
+        signature = file_signature(self.current_fn().watch_paths())
+        try:
+            candidate = self.load_fn()
+            if candidate is None:
+                raise RuntimeError("Backend failed to load, see the server log")
+            record["to_version"] = candidate.version
+            if candidate.version == record["from_version"] and not force:
+                outcome = "unchanged"
+            else:
+                cleanup = self._swap(candidate)
+                if cleanup is not None:
+                    cleanup()
+                outcome = "swapped"
+                self.reloads += 1
+        except Exception as e:
+            logger.error(f"❌ Model reload failed, still serving {record['from_version']}: {type(e).__name__}: {e}")
+            record["error"] = f"{type(e).__name__}: {e}"
+            outcome = "failed"
+            self.failures += 1
+
+        self._loaded_signature = signature
+        record["load_seconds"] = round(time.perf_counter() - started, 4)
+        record["finished_at"] = time.time()
+        record["state"] = outcome
+        self.state = outcome
+        if outcome == "swapped":
+            logger.info(
+                f"✓ Model reloaded ({record['trigger']}): {record['from_version']} -> {record['to_version']} "
+                f"in {record['load_seconds']:.2f} s"
+            )
+        elif outcome == "unchanged":
+            logger.info(f"Model reload ({record['trigger']}): version {record['to_version']} unchanged, not swapped")
+
+    def _swap(self, candidate):
+        if self.loop is None or not self.loop.is_running():
+            return self.swap_fn(candidate)
+        # Run between two event-loop steps so no handler sees a half-done swap
+        future = concurrent.futures.Future()
+
+        def swap():
+            try:
+                future.set_result(self.swap_fn(candidate))
+            except Exception as e:
+                future.set_exception(e)
+
+        self.loop.call_soon_threadsafe(swap)
+        return future.result()
+
+    def _watch(self):
+        while not self._stop.wait(self.watch_seconds):
+            if self.state == "loading" or self._loaded_signature is None:
+                continue
+            try:
+                signature = file_signature(self.current_fn().watch_paths())
+            except Exception as e:
+                logger.warning(f"Model file watcher error: {e}")
+                continue
+            if signature == self._loaded_signature:
+                self._changed_signature = None
+            elif signature != self._changed_signature:
+                # Changed since the last poll: wait for it to settle
+                self._changed_signature = signature
+            else:
+                self._changed_signature = None
+                logger.info("Model files changed, reloading")
+                try:
+                    self.request(trigger="watcher")
+                except ReloadInProgress:
+                    pass
+
+    def status(self):
+        """Reload state, counters and the last attempt"""
+        return {
+            "state": self.state,
+            "active_version": self.current_fn().version,
+            "watch_seconds": self.watch_seconds if self.watch_seconds > 0 else None,
+            "reloads": self.reloads,
+            "failures": self.failures,
+            "last": dict(self.last) if self.last is not None else None,
+        }
@@ -0,0 +1,419 @@
+"""
+Asynchronous scoring jobs.
+
+Batches that take minutes cannot be held on one HTTP connection through
+Render's proxy. POST /jobs stores the submitted batch (a JSON patients list,
+NDJSON or CSV) in JOB_DIR and returns a job ID right away; a small pool of
+JOB_WORKERS threads scores queued jobs with the loaded backend, in
+JOB_CHUNK_ROWS chunks, writing the results (same records as
+/predict/stream) to disk as it goes. Clients poll GET /jobs/{id}, follow
+GET /jobs/{id}/events, and download GET /jobs/{id}/result once it succeeded.
+
+Jobs share the worker's CPU with /predict, so concurrency is capped by
+JOB_WORKERS and the queue by JOB_QUEUE_SIZE (further submissions get a 429),
+and each worker yields for JOB_YIELD_MS between chunks. server.py hands the
+queue a model_fn whose predict_fn runs on the inference executor as
+background work, so job scoring only uses inference threads /predict is not
+waiting for. A job is scored entirely by the model version that was active
+when it started, even if the model is hot-reloaded meanwhile.
+
+Job state lives in JOB_DIR/<id>/status.json, written atomically, so with
+several uvicorn workers and a shared JOB_DIR any worker can answer status,
+result and cancel requests; only the worker that accepted a job runs it.
+Finished jobs are deleted after JOB_TTL_SECONDS, checked every
+JOB_CLEANUP_SECONDS.
+"""
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+from bulk_score import NpyInput, open_input
+from compact import JsonFormat, read_rows
+from schemas import PatientData
+from streaming import CSV_TYPES, FORMATS, NDJSON_TYPES, ChunkScorer
+from streaming import OPENAPI_REQUEST_BODY as STREAM_REQUEST_BODY
+from validation import ColumnarValidator
+import numpy as np
+import asyncio
+import json
+import logging
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+JOB_DIR = os.getenv("JOB_DIR", os.path.join(tempfile.gettempdir(), "diabetes_jobs"))
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "1"))
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "16"))
+JOB_CHUNK_ROWS = int(os.getenv("JOB_CHUNK_ROWS", "4096"))
+JOB_YIELD_MS = float(os.getenv("JOB_YIELD_MS", "1"))
+# CSV/NDJSON uploads are streamed to disk; JSON is parsed in memory, so it gets a far lower cap
+JOB_MAX_UPLOAD_BYTES = int(os.getenv("JOB_MAX_UPLOAD_BYTES", str(1024 * 1024 * 1024)))
+JOB_MAX_JSON_BYTES = int(os.getenv("JOB_MAX_JSON_BYTES", str(64 * 1024 * 1024)))
+JOB_TTL_SECONDS = float(os.getenv("JOB_TTL_SECONDS", "86400"))
+JOB_CLEANUP_SECONDS = float(os.getenv("JOB_CLEANUP_SECONDS", "600"))
+
+# Input file name per submitted format
+INPUT_FILES = {"json": "input.npy", "ndjson": "input.ndjson", "csv": "input.csv"}
+TERMINAL_STATES = ("succeeded", "failed", "cancelled")
+
+# Documents the accepted bodies of POST /jobs in the OpenAPI schema
+JOB_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "application/json": {"schema": {"$ref": "#/components/schemas/BatchPredictionRequest"}},
+            **STREAM_REQUEST_BODY["requestBody"]["content"],
+        },
+    }
+}
+
+# Progress is written to status.json at most this often while a job runs
+_STATUS_INTERVAL = 1.0
+
+# Identifies this process across restarts that reuse its PID (PID 1 in containers)
+_OWNER = f"{os.getpid()}:{uuid.uuid4().hex}"
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+class JobStore:
+    """Job directories and their status.json files under JOB_DIR"""
+
+    def __init__(self, root=JOB_DIR):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, job_id, name=""):
+        # IDs are uuid4 hex; anything else must not escape JOB_DIR
+        if not (len(job_id) == 32 and all(c in "0123456789abcdef" for c in job_id)):
+            raise KeyError(job_id)
+        return os.path.join(self.root, job_id, name)
+
+    def create(self, input_format, output_format):
+        job_id = uuid.uuid4().hex
+        os.makedirs(self.path(job_id))
+        status = {
+            "job_id": job_id,
+            "status": "receiving",
+            "input_format": input_format,
+            "output_format": output_format,
+            "rows_total": None,
+            "rows_done": 0,
+            "rows_rejected": 0,
+            "progress": 0.0,
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "error": None,
+            "result_url": None,
+            "model_version": None,
+            "owner": _OWNER,
+        }
+        self.save(status)
+        return status
+
+    def save(self, status):
+        path = self.path(status["job_id"], "status.json")
+        with open(path + ".tmp", "w") as f:
+            json.dump(status, f)
+        os.replace(path + ".tmp", path)
+
+    def load(self, job_id):
+        """Status dict, or None for unknown (or deleted) jobs"""
+        try:
+            with open(self.path(job_id, "status.json")) as f:
+                return json.load(f)
+        except (KeyError, OSError, ValueError):
+            return None
+
+    def input_path(self, status):
+        return self.path(status["job_id"], INPUT_FILES[status["input_format"]])
+
+    def result_path(self, status):
+        return self.path(status["job_id"], f"result.{status['output_format']}")
+
+    def request_cancel(self, job_id):
+        open(self.path(job_id, "cancel"), "w").close()
+
+    def cancel_requested(self, job_id):
+        return os.path.exists(self.path(job_id, "cancel"))
+
+    def delete(self, job_id):
+        shutil.rmtree(self.path(job_id), ignore_errors=True)
+
+    def cleanup(self, ttl=JOB_TTL_SECONDS):
+        """Delete finished jobs older than ttl and fail jobs whose owning process is gone"""
+        now = time.time()
+        for job_id in os.listdir(self.root):
+            status = self.load(job_id)
+            if status is None:
+                continue
+            if status["status"] in TERMINAL_STATES:
+                if now - status["finished_at"] > ttl:
+                    self.delete(job_id)
+            elif not _owner_alive(status["owner"]):
+                status.update(status="failed", error="Interrupted by a server restart", finished_at=now)
+                self.save(status)
+
+
+def _owner_alive(owner):
+    pid = int(owner.partition(":")[0])
+    if pid == os.getpid():
+        return owner == _OWNER
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+async def read_body(request, max_bytes=JOB_MAX_JSON_BYTES):
+    """The request body, or None as soon as it grows past max_bytes"""
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > max_bytes:
+            return None
+    return body
+
+
+async def receive_input(request, path, max_bytes=JOB_MAX_UPLOAD_BYTES):
+    """Write the request body to path without holding it in memory; False if over max_bytes"""
+    received = 0
+    with open(path, "wb") as f:
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > max_bytes:
+                return False
+            f.write(chunk)
+    return True
+
+
+def _save_json_batch(body, path):
+    """Validate a BatchPredictionRequest body column-wise and store it as an (n, 8) .npy input"""
+    # 422s have the same shape as FastAPI's own
+    np.save(path, read_rows(JsonFormat(), body, False, ColumnarValidator(PatientData)))
+
+
+def input_format_for(content_type):
+    """'json', 'ndjson' or 'csv' for a request Content-Type, or 415"""
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    if media_type == "application/json":
+        return "json"
+    if media_type in NDJSON_TYPES:
+        return "ndjson"
+    if media_type in CSV_TYPES:
+        return "csv"
+    raise HTTPException(
+        status_code=415,
+        detail=f"Content-Type must be application/json or one of {list(NDJSON_TYPES + CSV_TYPES)}"
+    )
+
+
+async def accept_job(request, store, job_queue, output_format=None):
+    """Store the submitted batch and queue it; returns the job's status dict"""
+    input_format = input_format_for(request.headers.get("content-type"))
+    if output_format is None:
+        output_format = "csv" if input_format == "csv" else "ndjson"
+    elif output_format not in FORMATS:
+        raise HTTPException(status_code=422, detail=f"format must be one of {sorted(FORMATS)}")
+
+    max_bytes = JOB_MAX_JSON_BYTES if input_format == "json" else JOB_MAX_UPLOAD_BYTES
+    too_large = HTTPException(status_code=413, detail=f"Body larger than {max_bytes} bytes")
+    if int(request.headers.get("content-length") or 0) > max_bytes:
+        raise too_large
+
+    status = store.create(input_format, output_format)
+    path = store.input_path(status)
+    try:
+        if input_format == "json":
+            # Parsed in memory, so stop reading as soon as the cap is crossed
+            body = await read_body(request, max_bytes)
+            if body is None:
+                raise too_large
+            await run_in_threadpool(_save_json_batch, body, path)
+        else:
+            if not await receive_input(request, path, max_bytes):
+                raise too_large
+            # Reads the CSV header, so a bad one is rejected now rather than failing the job
+            try:
+                await run_in_threadpool(open_input, path)
+            except ValueError as e:
+                raise HTTPException(status_code=422, detail=str(e).replace(path, "Request body"))
+        job_queue.submit(status)
+    except JobQueueFull as e:
+        store.delete(status["job_id"])
+        raise HTTPException(status_code=429, detail=f"Job queue is full: {e}", headers={"Retry-After": "30"})
+    except BaseException:
+        store.delete(status["job_id"])
+        raise
+    return status
+
+
+async def status_events(store, job_id, poll_seconds=0.5):
+    """NDJSON lines with the job's status each time it changes, until it finishes"""
+    last = None
+    while True:
+        status = store.load(job_id)
+        if status is None:
+            yield json.dumps({"job_id": job_id, "status": "deleted"}) + "\n"
+            return
+        if status != last:
+            yield json.dumps(public_status(status)) + "\n"
+            last = status
+        if status["status"] in TERMINAL_STATES:
+            return
+        await asyncio.sleep(poll_seconds)
+
+
+def public_status(status):
+    """Status dict without internal fields"""
+    return {key: value for key, value in status.items() if key != "owner"}
+
+
+class JobQueue:
+    """Bounded queue of jobs scored by JOB_WORKERS background threads"""
+
+    def __init__(self, store, model_fn, workers=JOB_WORKERS, max_queued=JOB_QUEUE_SIZE,
+                 chunk_rows=JOB_CHUNK_ROWS, yield_ms=JOB_YIELD_MS, cleanup_seconds=JOB_CLEANUP_SECONDS):
+        self.store = store
+        # () -> (predict_fn, model_version), called once per job
+        self.model_fn = model_fn
+        self.workers = workers
+        self.chunk_rows = chunk_rows
+        self.yield_seconds = yield_ms / 1000
+        self.cleanup_seconds = cleanup_seconds
+        self._queue = queue.Queue(maxsize=max_queued)
+        self._threads = []
+        self._stop = threading.Event()
+        self.completed = 0
+        self.failed = 0
+
+    def start(self):
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        if self.cleanup_seconds > 0:
+            threading.Thread(target=self._cleanup_loop, name="job-cleanup", daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+        for _ in self._threads:
+            try:
+                self._queue.put_nowait(None)
+            except queue.Full:
+                pass
+
+    def submit(self, status):
+        """Queue a received job; raises JobQueueFull when JOB_QUEUE_SIZE jobs are waiting"""
+        if self._queue.full():
+            raise JobQueueFull(f"{self._queue.maxsize} jobs already queued")
+        # Save before queueing: once queued, a worker may be writing the status too
+        status["status"] = "queued"
+        self.store.save(status)
+        try:
+            self._queue.put_nowait(status["job_id"])
+        except queue.Full:
+            raise JobQueueFull(f"{self._queue.maxsize} jobs already queued")
+
+    def stats(self):
+        return {
+            "workers": self.workers,
+            "queued": self._queue.qsize(),
+            "max_queued": self._queue.maxsize,
+            "completed": self.completed,
+            "failed": self.failed,
+        }
+
+    def _run(self):
+        while not self._stop.is_set():
+            job_id = self._queue.get()
+            if job_id is None:
+                break
+            status = self.store.load(job_id)
+            if status is None:
+                # Deleted while queued
+                continue
+            try:
+                self._score(status)
+            except Exception as e:
+                logger.error(f"❌ Job {job_id} failed: {type(e).__name__}: {e}")
+                status.update(status="failed", error=f"{type(e).__name__}: {e}", finished_at=time.time())
+                self.failed += 1
+                self._save(status)
+
+    def _cleanup_loop(self):
+        # The server cleans up once at startup; this keeps expiring jobs on long-running instances
+        while not self._stop.wait(self.cleanup_seconds):
+            try:
+                self.store.cleanup()
+            except Exception as e:
+                logger.error(f"❌ Job cleanup failed: {type(e).__name__}: {e}")
+
+    def _save(self, status):
+        # The job directory is gone if the job was deleted while running
+        if os.path.isdir(self.store.path(status["job_id"])):
+            self.store.save(status)
+
+    def _score(self, status):
+        job_id = status["job_id"]
+        if self.store.cancel_requested(job_id):
+            status.update(status="cancelled", finished_at=time.time())
+            self._save(status)
+            return
+
+        source = open_input(self.store.input_path(status))
+        task = (0, source.n_rows) if isinstance(source, NpyInput) else source.whole()
+        out_format = FORMATS[status["output_format"]]()
+        predict_fn, model_version = self.model_fn()
+        scorer = ChunkScorer(predict_fn, None, out_format, ColumnarValidator(PatientData), chunk_rows=1)
+        status.update(
+            status="running", started_at=time.time(), rows_total=source.n_rows, model_version=model_version
+        )
+        self._save(status)
+        logger.info(f"Job {job_id}: scoring {source.n_rows} rows ({status['input_format']} -> {out_format.name})")
+
+        result_path = self.store.result_path(status)
+        row = 0
+        saved_at = time.monotonic()
+        with open(result_path + ".tmp", "wb") as out:
+            out.write(out_format.output_header())
+            for X, errors in source.blocks(task, self.chunk_rows):
+                if self._stop.is_set() or self.store.cancel_requested(job_id):
+                    status.update(status="cancelled", finished_at=time.time())
+                    self._save(status)
+                    return
+                probabilities, errors = scorer.probabilities(X, errors)
+                out.write(out_format.format(row, probabilities, errors))
+                row += len(probabilities)
+
+                if time.monotonic() - saved_at > _STATUS_INTERVAL:
+                    status.update(
+                        rows_done=row, rows_rejected=scorer.rows_rejected,
+                        progress=round(row / max(source.n_rows, 1), 4)
+                    )
+                    self._save(status)
+                    saved_at = time.monotonic()
+                # Let request threads have the GIL between chunks
+                time.sleep(self.yield_seconds)
+
+        os.replace(result_path + ".tmp", result_path)
+        status.update(
+            status="succeeded", rows_done=row, rows_rejected=scorer.rows_rejected, progress=1.0,
+            finished_at=time.time(), result_url=f"/jobs/{job_id}/result"
+        )
+        self._save(status)
+        self.completed += 1
+        logger.info(
+            f"✓ Job {job_id}: {row} rows ({scorer.rows_rejected} rejected) "
+            f"in {status['finished_at'] - status['started_at']:.2f} s"
+        )
@@ -0,0 +1,12 @@
+"""
+Entry point for the NumPy network API (`uvicorn main_mlp:app`).
+
+The app lives in server.py; this module only makes the NumPy forward pass of
+the Keras network the default backend. Serves diabetes_model_mlp.npz, which
+rebuild_model.py or `python mlp_engine.py` writes; TensorFlow is not needed.
+"""
+import os
+
+os.environ.setdefault("MODEL_BACKEND", "mlp")
+
+from server import app  # noqa: E402,F401
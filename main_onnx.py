@@ -0,0 +1,11 @@
+"""
+Entry point for the ONNX Runtime API (`uvicorn main_onnx:app`).
+
+The app lives in server.py; this module only makes the ONNX backend the
+default. Serves diabetes_model.onnx unless ONNX_MODEL_PATH points elsewhere.
+"""
+import os
+
+os.environ.setdefault("MODEL_BACKEND", "onnx")
+
+from server import app  # noqa: E402,F401
@@ -0,0 +1,266 @@
+"""
+Prometheus metrics without extra dependencies.
+
+Counters, gauges and histograms are kept in plain dicts keyed by label
+values and rendered in the Prometheus text format (0.0.4) on GET /metrics.
+MetricsMiddleware is a pure ASGI middleware (no BaseHTTPMiddleware task
+overhead) that counts requests, errors and in-flight requests and times each
+request. Handlers time their own stages with the StageClock it stores in the
+request state:
+
+    validation      middleware entry -> handler entry (body read, JSON, pydantic)
+    queue           waiting for an inference thread (executor.py)
+    features        PatientData -> float64 array
+    cache           prediction cache lookup
+    scaling         backend.scale()
+    inference       backend.infer() (or the micro-batcher round trip)
+    serialization   handler result -> response start (response_model, JSON)
+
+Recording a sample is a perf_counter() call, a bisect and a locked
+increment, a few microseconds per request in total. Metrics are per worker
+process.
+"""
+from bisect import bisect_left
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+
+LATENCY_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+# Starlette appends "; charset=utf-8" to text/* media types
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+
+def _format_labels(names, values, extra=""):
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic count per label set"""
+
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels=(), amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def collect(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class Gauge(Counter):
+    """Current value per label set, either set directly or read from a callback at scrape time"""
+
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames=(), callback=None):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+
+    def set(self, value, labels=()):
+        with self._lock:
+            self._values[labels] = value
+
+    def dec(self, labels=(), amount=1):
+        self.inc(labels, -amount)
+
+    def clear(self):
+        """Drop every label set (e.g. the previous model version)"""
+        with self._lock:
+            self._values.clear()
+
+    def collect(self):
+        if self.callback is not None:
+            value = self.callback()
+            if value is not None:
+                self.set(value)
+        return super().collect()
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram per label set"""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts (+Inf last), sum, count]
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, labels=()):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def collect(self):
+        with self._lock:
+            items = sorted((labels, (list(s[0]), s[1], s[2])) for labels, s in self._series.items())
+        for labels, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(total)}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, labels)} {count}"
+
+
+class Registry:
+    """Ordered set of metrics rendered together"""
+
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+class StageClock:
+    """Records the time since the previous lap as one stage of a request"""
+
+    __slots__ = ("histogram", "endpoint", "last", "used")
+
+    def __init__(self, histogram, endpoint, started):
+        self.histogram = histogram
+        self.endpoint = endpoint
+        self.last = started
+        self.used = False
+
+    def lap(self, stage):
+        now = time.perf_counter()
+        self.histogram.observe(now - self.last, (self.endpoint, stage))
+        self.last = now
+        self.used = True
+
+
+class _NullClock:
+    """Stand-in when metrics are disabled"""
+
+    def lap(self, stage):
+        pass
+
+
+NULL_CLOCK = _NullClock()
+
+
+def stage_clock(request):
+    """The StageClock MetricsMiddleware attached to this request, or a no-op clock"""
+    return request.scope.get("state", {}).get("stage_clock", NULL_CLOCK)
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware counting and timing every HTTP request"""
+
+    def __init__(self, app, metrics, endpoints):
+        self.app = app
+        self.metrics = metrics
+        # Unknown paths share one label so scanners cannot blow up cardinality
+        self.endpoints = frozenset(endpoints)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        metrics = self.metrics
+        started = time.perf_counter()
+        endpoint = scope["path"] if scope["path"] in self.endpoints else "other"
+        clock = StageClock(metrics.stage_duration, endpoint, started)
+        scope.setdefault("state", {})["stage_clock"] = clock
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if clock.used:
+                    clock.lap("serialization")
+            await send(message)
+
+        metrics.in_flight.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            metrics.in_flight.dec()
+            labels = (endpoint, str(status_code))
+            metrics.requests.inc(labels)
+            if status_code >= 400:
+                metrics.errors.inc(labels)
+            metrics.request_duration.observe(time.perf_counter() - started, (endpoint,))
+
+
+class ApiMetrics:
+    """Every metric the API exports"""
+
+    def __init__(self):
+        self.registry = Registry()
+        register = self.registry.register
+        self.requests = register(Counter(
+            "diabetes_api_requests_total", "HTTP requests by endpoint and status code",
+            ("endpoint", "status")))
+        self.errors = register(Counter(
+            "diabetes_api_request_errors_total", "HTTP responses with status >= 400",
+            ("endpoint", "status")))
+        self.request_duration = register(Histogram(
+            "diabetes_api_request_duration_seconds", "Time from request start to response end",
+            ("endpoint",)))
+        self.stage_duration = register(Histogram(
+            "diabetes_api_stage_duration_seconds", "Time spent in each stage of a prediction request",
+            ("endpoint", "stage")))
+        self.in_flight = register(Gauge(
+            "diabetes_api_in_flight_requests", "Requests currently being handled"))
+        self.model_info = register(Gauge(
+            "diabetes_api_model_info", "Loaded backend and model version (always 1)",
+            ("backend", "version")))
+
+    def gauge(self, name, documentation, callback):
+        """Register a gauge whose value is read from callback() at scrape time"""
+        return self.registry.register(Gauge(name, documentation, callback=callback))
+
+    def render(self):
+        return self.registry.render()
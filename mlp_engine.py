@@ -0,0 +1,156 @@
+"""
+Pure-NumPy inference for the small Keras network.
+
+The network built by rebuild_model.py is 8 -> 16 -> 8 -> 1 Dense layers with
+ReLU/sigmoid (Dropout does nothing at inference). Running it through
+TensorFlow costs hundreds of MB of RAM and milliseconds per call. The layer
+weights and the scaler's mean/scale are extracted once into a compact .npz,
+and the forward pass is one in-place scaling step plus a batched float32
+matmul per layer, like Keras computes it.
+
+Every export is compared against model.predict. The sample rows and Keras'
+probabilities are stored in the .npz, so the backend repeats the check at
+load time without TensorFlow.
+
+Extract weights from an existing model with:
+
+    python mlp_engine.py [diabetes_model_savedmodel|diabetes_model.h5]
+"""
+from fusion import FusedScaler, KERAS_PARITY_ATOL, sample_rows
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+MLP_WEIGHTS_PATH = "diabetes_model_mlp.npz"
+
+PARITY_ROWS = 64
+
+ACTIVATIONS = ("linear", "relu", "sigmoid", "tanh")
+
+
+def dense_layers(model):
+    """(name, kernel, bias, activation) for each Dense layer of a Sequential Keras model"""
+    layers = []
+    for layer in model.layers:
+        kind = type(layer).__name__
+        if kind == "Dropout":
+            # Inactive at inference time
+            continue
+        if kind != "Dense":
+            raise ValueError(f"Cannot export {kind} layer {layer.name!r}, only Dense and Dropout")
+        activation = layer.get_config()["activation"]
+        if activation not in ACTIVATIONS:
+            raise ValueError(f"Cannot export activation {activation!r} of layer {layer.name!r}")
+        kernel, bias = layer.get_weights()
+        layers.append((layer.name, kernel, bias, activation))
+    return layers
+
+
+class NumpyMLP:
+    """Scaler + Dense stack with a drop-in predict for raw (n, 8) rows"""
+
+    def __init__(self, layers, mean, scale):
+        self.kernels = [np.ascontiguousarray(kernel, dtype=np.float32) for _, kernel, _, _ in layers]
+        self.biases = [np.ascontiguousarray(bias, dtype=np.float32) for _, _, bias, _ in layers]
+        self.activations = [activation for _, _, _, activation in layers]
+        self.scaler = FusedScaler.from_arrays(
+            np.asarray(mean, dtype=np.float64), np.asarray(scale, dtype=np.float64)
+        )
+        self.parity_rows = None
+        self.parity_expected = None
+
+    @classmethod
+    def from_keras(cls, model, scaler):
+        fused = FusedScaler(scaler)
+        return cls(dense_layers(model), fused.mean, fused.scale)
+
+    def save(self, path):
+        """Write weights, activations, scaler and parity data as one uncompressed .npz"""
+        arrays = {
+            "activations": np.array(self.activations),
+            "scaler_mean": self.scaler.mean,
+            "scaler_scale": self.scaler.scale,
+            "parity_rows": self.parity_rows,
+            "parity_expected": self.parity_expected,
+        }
+        for i, (kernel, bias) in enumerate(zip(self.kernels, self.biases)):
+            arrays[f"kernel_{i}"] = kernel
+            arrays[f"bias_{i}"] = bias
+        with open(path, "wb") as f:
+            np.savez(f, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            activations = [str(a) for a in data["activations"]]
+            layers = [
+                (f"dense_{i}", data[f"kernel_{i}"], data[f"bias_{i}"], activation)
+                for i, activation in enumerate(activations)
+            ]
+            mlp = cls(layers, data["scaler_mean"], data["scaler_scale"])
+            mlp.parity_rows = data["parity_rows"]
+            mlp.parity_expected = data["parity_expected"]
+        return mlp
+
+    def predict(self, X):
+        """Class-1 probabilities for raw float64 rows; X is scaled in place"""
+        # Scale in float64 like the sklearn scaler, then run the layers in float32 like Keras
+        return self.forward(self.scaler.transform(X))
+
+    def forward(self, X_scaled):
+        """Class-1 probabilities for already scaled rows"""
+        hidden = X_scaled.astype(np.float32)
+        for kernel, bias, activation in zip(self.kernels, self.biases, self.activations):
+            hidden = hidden @ kernel
+            hidden += bias
+            if activation == "relu":
+                np.maximum(hidden, 0.0, out=hidden)
+            elif activation == "sigmoid":
+                np.negative(hidden, out=hidden)
+                np.exp(hidden, out=hidden)
+                hidden += 1.0
+                np.reciprocal(hidden, out=hidden)
+            elif activation == "tanh":
+                np.tanh(hidden, out=hidden)
+        return hidden[:, 0]
+
+    def parity_error(self, rows=None, expected=None):
+        """Largest absolute difference from the reference probabilities (stored ones by default)"""
+        if rows is None:
+            rows, expected = self.parity_rows, self.parity_expected
+        return float(np.max(np.abs(self.predict(np.array(rows, dtype=np.float64)) - expected)))
+
+
+def export_keras_mlp(model, scaler, path=MLP_WEIGHTS_PATH):
+    """
+    Extract a Keras model's weights to `path` after checking them against model.predict.
+
+    Returns the max parity error; raises ValueError above KERAS_PARITY_ATOL.
+    """
+    mlp = NumpyMLP.from_keras(model, scaler)
+    rows = sample_rows(scaler, PARITY_ROWS)
+    expected = model.predict(scaler.transform(rows), batch_size=len(rows), verbose=0)[:, 0]
+    error = mlp.parity_error(rows, expected)
+    if error > KERAS_PARITY_ATOL:
+        raise ValueError(f"NumPy forward pass differs from model.predict by {error:.2e}")
+
+    mlp.parity_rows = rows
+    mlp.parity_expected = expected.astype(np.float64)
+    mlp.save(path)
+    logger.info(f"✓ Exported {path} ({len(mlp.kernels)} layers, max parity error {error:.2e})")
+    return error
+
+
+if __name__ == "__main__":
+    import joblib
+    import sys
+    import tensorflow as tf
+
+    model_path = sys.argv[1] if len(sys.argv) > 1 else "diabetes_model_savedmodel"
+    print(f"Loading {model_path} and scaler.joblib...")
+    model = tf.keras.models.load_model(model_path)
+    scaler = joblib.load("scaler.joblib")
+
+    error = export_keras_mlp(model, scaler, MLP_WEIGHTS_PATH)
+    print(f"✓ Saved: {MLP_WEIGHTS_PATH} (max parity error {error:.2e})")
@@ -0,0 +1,167 @@
+"""
+ONNX export of the served models.
+
+The RandomForest is converted with skl2onnx; the Keras Dense network is
+rebuilt directly from its layer weights with onnx.helper (Gemm + activation
+per Dense layer, Dropout dropped), so no tf2onnx is needed. Both graphs take
+raw (n, 8) float64 rows in FEATURE_NAMES order and apply the scaler's
+mean/scale in float64 inside the graph, exactly like the fused scaler, before
+casting to float32. The ONNX backend therefore needs neither sklearn nor
+TensorFlow.
+
+Every export is checked against the original model. The sample rows and the
+original model's probabilities are stored in the file's metadata, so the
+backend can repeat the parity check at load time without the original model.
+"""
+from fusion import FusedScaler, sample_rows
+from features import N_FEATURES
+from mlp_engine import dense_layers
+import numpy as np
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+FOREST_ONNX_PATH = "diabetes_model.onnx"
+KERAS_ONNX_PATH = "diabetes_model_keras.onnx"
+
+ONNX_OPSET = 17
+INPUT_NAME = "features"
+OUTPUT_NAME = "probabilities"
+PARITY_METADATA_KEY = "parity"
+
+# Rows stored in the metadata for the load-time check, and the allowed error
+# (ONNX Runtime sums tree outputs and runs the network in float32)
+PARITY_ROWS = 64
+ONNX_PARITY_ATOL = 1e-5
+
+KERAS_ACTIVATIONS = {"relu": "Relu", "sigmoid": "Sigmoid", "tanh": "Tanh"}
+
+
+def _scaler_prefix(scaler, output_name):
+    """Nodes/initializers for (features - mean) / scale in float64, cast to float32"""
+    from onnx import TensorProto, helper, numpy_helper
+
+    fused = FusedScaler(scaler)
+    initializers = [
+        numpy_helper.from_array(np.asarray(fused.mean, dtype=np.float64), "scaler_mean"),
+        numpy_helper.from_array(np.asarray(fused.scale, dtype=np.float64), "scaler_scale"),
+    ]
+    nodes = [
+        helper.make_node("Sub", [INPUT_NAME, "scaler_mean"], ["centered"]),
+        helper.make_node("Div", ["centered", "scaler_scale"], ["scaled64"]),
+        helper.make_node("Cast", ["scaled64"], [output_name], to=TensorProto.FLOAT),
+    ]
+    return nodes, initializers
+
+
+def forest_to_onnx(model, scaler):
+    """ONNX graph for scaler + RandomForestClassifier, output (n, 2) probabilities"""
+    from onnx import TensorProto, helper
+    from skl2onnx import convert_sklearn
+    from skl2onnx.common.data_types import FloatTensorType
+
+    onnx_model = convert_sklearn(
+        model,
+        initial_types=[("scaled", FloatTensorType([None, N_FEATURES]))],
+        options={id(model): {"zipmap": False}},
+        target_opset=ONNX_OPSET,
+    )
+    graph = onnx_model.graph
+
+    # Replace the float32 "scaled" input with raw float64 features + in-graph scaling
+    nodes, initializers = _scaler_prefix(scaler, "scaled")
+    del graph.input[:]
+    graph.input.append(helper.make_tensor_value_info(INPUT_NAME, TensorProto.DOUBLE, [None, N_FEATURES]))
+    graph.initializer.extend(initializers)
+    tree_nodes = list(graph.node)
+    del graph.node[:]
+    graph.node.extend(nodes + tree_nodes)
+    return onnx_model
+
+
+def keras_to_onnx(model, scaler):
+    """ONNX graph for scaler + a Sequential Dense network, output (n, 1) probabilities"""
+    from onnx import TensorProto, helper, numpy_helper
+
+    nodes, initializers = _scaler_prefix(scaler, "scaled")
+    current = "scaled"
+    for i, (_, kernel, bias, activation) in enumerate(dense_layers(model), start=1):
+        name = f"dense{i}"
+        initializers += [
+            numpy_helper.from_array(kernel.astype(np.float32), f"{name}_kernel"),
+            numpy_helper.from_array(bias.astype(np.float32), f"{name}_bias"),
+        ]
+        nodes.append(helper.make_node("Gemm", [current, f"{name}_kernel", f"{name}_bias"], [name]))
+        current = name
+
+        if activation != "linear":
+            nodes.append(helper.make_node(KERAS_ACTIVATIONS[activation], [current], [f"{name}_{activation}"]))
+            current = f"{name}_{activation}"
+
+    nodes.append(helper.make_node("Identity", [current], [OUTPUT_NAME]))
+    graph = helper.make_graph(
+        nodes,
+        "diabetes_network",
+        [helper.make_tensor_value_info(INPUT_NAME, TensorProto.DOUBLE, [None, N_FEATURES])],
+        [helper.make_tensor_value_info(OUTPUT_NAME, TensorProto.FLOAT, [None, 1])],
+        initializers,
+    )
+    onnx_model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", ONNX_OPSET)])
+    # IR version 8 keeps the file loadable by older onnxruntime releases
+    onnx_model.ir_version = 8
+    return onnx_model
+
+
+def onnx_predict(session, X):
+    """Class-1 probabilities from an ONNX Runtime session for raw (n, 8) rows"""
+    X = np.ascontiguousarray(X, dtype=np.float64)
+    return session.run([OUTPUT_NAME], {INPUT_NAME: X})[0][:, -1]
+
+
+def parity_error(session, rows, expected):
+    """Largest absolute difference between the session and expected probabilities"""
+    return float(np.max(np.abs(onnx_predict(session, rows) - np.asarray(expected))))
+
+
+def export_onnx(onnx_model, reference_fn, scaler, path):
+    """
+    Verify an ONNX graph against reference_fn (raw rows -> probabilities) and save it.
+
+    The parity rows and reference probabilities are embedded in the file's
+    metadata. Raises ValueError if the graph does not match the original.
+    """
+    import onnx
+    import onnxruntime as ort
+
+    onnx.checker.check_model(onnx_model)
+    rows = sample_rows(scaler, PARITY_ROWS)
+    expected = np.asarray(reference_fn(rows.copy()), dtype=np.float64)
+
+    session = ort.InferenceSession(onnx_model.SerializeToString(), providers=["CPUExecutionProvider"])
+    error = parity_error(session, rows, expected)
+    if error > ONNX_PARITY_ATOL:
+        raise ValueError(f"ONNX export of {path} differs from the original model by {error:.2e}")
+
+    entry = onnx_model.metadata_props.add()
+    entry.key = PARITY_METADATA_KEY
+    entry.value = json.dumps({"rows": rows.tolist(), "expected": expected.tolist(), "atol": ONNX_PARITY_ATOL})
+    onnx.save(onnx_model, path)
+    logger.info(f"✓ Exported {path} (max parity error {error:.2e})")
+    return error
+
+
+def export_forest_onnx(model, scaler, path=FOREST_ONNX_PATH):
+    """Export scaler + RandomForest; returns the max parity error"""
+    def reference(rows):
+        return model.predict_proba(scaler.transform(rows))[:, 1]
+
+    return export_onnx(forest_to_onnx(model, scaler), reference, scaler, path)
+
+
+def export_keras_onnx(model, scaler, path=KERAS_ONNX_PATH):
+    """Export scaler + Keras Dense network; returns the max parity error"""
+    def reference(rows):
+        return model.predict(scaler.transform(rows), batch_size=len(rows), verbose=0)[:, 0]
+
+    return export_onnx(keras_to_onnx(model, scaler), reference, scaler, path)
@@ -0,0 +1,111 @@
+"""
+In-process LRU/TTL cache for single predictions.
+
+Screening portals and the Streamlit app resubmit identical patients all the
+time. The cache key is a 16-byte BLAKE2 digest of the eight features (as
+float64, in FEATURE_NAMES order) plus the model version, so a hit skips
+scaling and inference entirely. Loading a different model version clears
+the cache.
+"""
+from collections import OrderedDict
+import numpy as np
+import hashlib
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+CACHE_ENABLED = os.getenv("CACHE_ENABLED", "1") == "1"
+CACHE_MAX_SIZE = int(os.getenv("CACHE_MAX_SIZE", "10000"))
+CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", "300"))
+
+
+class PredictionCache:
+    """Thread-safe LRU cache of class-1 probabilities with a per-entry TTL"""
+
+    def __init__(self, max_size=CACHE_MAX_SIZE, ttl_seconds=CACHE_TTL_SECONDS):
+        self.max_size = max(1, int(max_size))
+        self.ttl = float(ttl_seconds)
+        self.version = ""
+        self._salt = b""
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def set_version(self, version):
+        """Bind the cache to a model version, dropping entries from any other version"""
+        version = str(version or "")
+        with self._lock:
+            if version == self.version:
+                return
+            if self._entries:
+                self.invalidations += 1
+                logger.info(f"Prediction cache invalidated ({len(self._entries)} entries, model {version})")
+            self._entries.clear()
+            self.version = version
+            self._salt = version.encode()
+
+    def key(self, row, version=None):
+        """
+        Compact key for one raw feature row; pass the version of the model
+        that will score it so a request racing a hot reload cannot store an
+        old-model result under the new version
+        """
+        salt = self._salt if version is None else str(version).encode()
+        # + 0.0 folds -0.0 into 0.0 so equal values always hash the same
+        normalized = np.asarray(row, dtype=np.float64).reshape(-1) + 0.0
+        return hashlib.blake2b(normalized.tobytes(), digest_size=16, key=salt[:64]).digest()
+
+    def get(self, key):
+        """Cached probability or None"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            probability, expires_at = entry
+            if expires_at < now:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return probability
+
+    def put(self, key, probability):
+        with self._lock:
+            self._entries[key] = (probability, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Size, limits and hit/miss/eviction counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "model_version": self.version,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
@@ -0,0 +1,34 @@
+"""
+Per-process memory reporting.
+
+With several uvicorn workers, RSS alone over-counts memory that is shared
+through memory-mapped model files. PSS (proportional set size) divides each
+shared page between the processes mapping it, so the PSS of all workers adds
+up to their real footprint.
+"""
+import os
+import resource
+
+_SMAPS_FIELDS = {
+    "Rss": "rss_mb",
+    "Pss": "pss_mb",
+    "Shared_Clean": "shared_clean_mb",
+    "Shared_Dirty": "shared_dirty_mb",
+    "Private_Clean": "private_clean_mb",
+    "Private_Dirty": "private_dirty_mb",
+}
+
+
+def memory_usage():
+    """RSS/PSS breakdown of the current process in MB"""
+    stats = {"pid": os.getpid()}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                key, _, rest = line.partition(":")
+                if key in _SMAPS_FIELDS:
+                    stats[_SMAPS_FIELDS[key]] = round(int(rest.split()[0]) / 1024, 2)
+    except OSError:
+        # Not Linux (or no smaps_rollup): only peak RSS is available
+        stats["max_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 2)
+    return stats
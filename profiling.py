@@ -0,0 +1,330 @@
+"""
+Per-request profiling and slow-request stack sampling.
+
+Two independent captures, both stored in a bounded in-memory ProfileStore
+and served by the /admin/profiles endpoints:
+
+- cProfile: a request to a PROFILE_PATHS endpoint is profiled when it sends
+  "X-Profile: 1" (with PROFILE_HEADER_ENABLED=1) or is picked by
+  PROFILE_SAMPLE_RATE. The event-loop part (body read, JSON, pydantic,
+  response serialization) and the handler part (features, scaling,
+  inference, which run on an inference thread) get one profiler each and are
+  merged into a top-frames table. Only one request per worker is profiled at
+  a time; the event-loop profiler also sees other coroutines that run while
+  the request awaits, so profile under light load or at a low sample rate.
+- Stack sampling: a sampler thread wakes when an in-flight request passes
+  SLOW_REQUEST_MS and then records the stack of the thread working on it
+  every SLOW_SAMPLE_INTERVAL_MS until it finishes. Requests that end up
+  slower than the threshold are stored with their most frequent stacks.
+
+Both are off by default. Work done in the micro-batcher thread is not
+attributed to a request.
+"""
+from collections import Counter, deque
+import cProfile
+import functools
+import itertools
+import logging
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_HEADER_ENABLED = os.getenv("PROFILE_HEADER_ENABLED", "0") == "1"
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_PATHS = [p for p in os.getenv("PROFILE_PATHS", "/predict,/predict/batch").split(",") if p]
+PROFILE_TOP_FRAMES = int(os.getenv("PROFILE_TOP_FRAMES", "25"))
+PROFILE_STORE_SIZE = int(os.getenv("PROFILE_STORE_SIZE", "50"))
+
+# Milliseconds; 0 (the default) disables the slow-request sampler
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "0"))
+# Long-lived streaming endpoints (path prefixes) the sampler ignores
+SLOW_REQUEST_EXCLUDE = [p for p in os.getenv("SLOW_REQUEST_EXCLUDE", "/predict/stream,/jobs").split(",") if p]
+SLOW_SAMPLE_INTERVAL_MS = float(os.getenv("SLOW_SAMPLE_INTERVAL_MS", "5"))
+
+# Per stored record: distinct stacks kept and frames per stack (innermost first)
+PROFILE_MAX_STACKS = 10
+PROFILE_STACK_DEPTH = 30
+# Distinct stacks tracked while a request runs; further ones are counted as "other"
+_MAX_LIVE_STACKS = 200
+
+PROFILING_ENABLED = PROFILE_HEADER_ENABLED or PROFILE_SAMPLE_RATE > 0 or SLOW_REQUEST_MS > 0
+
+
+def _frame_label(filename, lineno, function):
+    return f"{os.path.basename(filename)}:{lineno}({function})"
+
+
+def _stack(frame):
+    """Innermost PROFILE_STACK_DEPTH frames of a thread's stack, outermost first"""
+    labels = []
+    while frame is not None and len(labels) < PROFILE_STACK_DEPTH:
+        code = frame.f_code
+        labels.append(_frame_label(code.co_filename, frame.f_lineno, code.co_name))
+        frame = frame.f_back
+    return tuple(reversed(labels))
+
+
+def top_frames(profilers, limit=PROFILE_TOP_FRAMES):
+    """Merge cProfile profilers and return the top functions by cumulative and own time"""
+    stats = None
+    for profiler in profilers:
+        profiler.create_stats()
+        if not profiler.stats:
+            continue
+        if stats is None:
+            stats = pstats.Stats(profiler)
+        else:
+            stats.add(profiler)
+    if stats is None:
+        return {"top_cumulative": [], "top_self": []}
+
+    rows = [
+        {
+            "function": _frame_label(*func),
+            "calls": calls,
+            "self_ms": round(own * 1000, 4),
+            "cumulative_ms": round(cumulative * 1000, 4),
+        }
+        for func, (_, calls, own, cumulative, _) in stats.stats.items()
+    ]
+    return {
+        "top_cumulative": sorted(rows, key=lambda r: r["cumulative_ms"], reverse=True)[:limit],
+        "top_self": sorted(rows, key=lambda r: r["self_ms"], reverse=True)[:limit],
+    }
+
+
+class RequestTrace:
+    """Profiling state of one in-flight request"""
+
+    __slots__ = ("id", "method", "path", "started", "thread_id", "profilers", "trigger", "samples")
+
+    def __init__(self, trace_id, method, path, trigger=None):
+        self.id = trace_id
+        self.method = method
+        self.path = path
+        self.started = time.perf_counter()
+        # Thread currently working on the request: the event loop, then the handler thread
+        self.thread_id = threading.get_ident()
+        self.profilers = [cProfile.Profile()] if trigger else []
+        self.trigger = trigger
+        self.samples = Counter()
+
+    @property
+    def profiled(self):
+        return bool(self.profilers)
+
+    def add_sample(self, frame):
+        stack = _stack(frame)
+        if stack in self.samples or len(self.samples) < _MAX_LIVE_STACKS:
+            self.samples[stack] += 1
+        else:
+            self.samples[("<other>",)] += 1
+
+    def run_handler(self, fn, *args, **kwargs):
+        """Call a sync handler, attributing samples (and a profile) to its thread"""
+        loop_thread = self.thread_id
+        self.thread_id = threading.get_ident()
+        profiler = None
+        if self.profilers:
+            profiler = cProfile.Profile()
+            self.profilers.append(profiler)
+            profiler.enable()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            self.thread_id = loop_thread
+
+
+def request_trace(request):
+    """The RequestTrace ProfilingMiddleware attached to this request, if any"""
+    return request.scope.get("state", {}).get("request_trace")
+
+
+def profiled(endpoint):
+    """Decorator for sync handlers taking `request`, so their thread is profiled and sampled"""
+    @functools.wraps(endpoint)
+    def wrapper(*args, **kwargs):
+        trace = request_trace(kwargs["request"])
+        if trace is None:
+            return endpoint(*args, **kwargs)
+        return trace.run_handler(endpoint, *args, **kwargs)
+    return wrapper
+
+
+class ProfileStore:
+    """Last PROFILE_STORE_SIZE captured profiles, newest first"""
+
+    def __init__(self, max_size=PROFILE_STORE_SIZE):
+        self._records = deque(maxlen=max_size)
+        self._lock = threading.Lock()
+        self.captured = 0
+
+    def add(self, record):
+        with self._lock:
+            self._records.appendleft(record)
+            self.captured += 1
+
+    def get(self, record_id):
+        with self._lock:
+            return next((r for r in self._records if r["id"] == record_id), None)
+
+    def summaries(self):
+        keys = ("id", "timestamp", "method", "path", "status", "duration_ms", "trigger", "samples")
+        with self._lock:
+            return [{key: r[key] for key in keys} for r in self._records]
+
+    def clear(self):
+        with self._lock:
+            self._records.clear()
+
+    def __len__(self):
+        return len(self._records)
+
+
+class SlowRequestSampler:
+    """Samples the stacks of in-flight requests that have run longer than threshold_ms"""
+
+    def __init__(self, threshold_ms=SLOW_REQUEST_MS, interval_ms=SLOW_SAMPLE_INTERVAL_MS):
+        self.threshold = threshold_ms / 1000
+        self.interval = interval_ms / 1000
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="slow-request-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def register(self, trace):
+        with self._lock:
+            self._in_flight[trace.id] = trace
+
+    def unregister(self, trace):
+        with self._lock:
+            self._in_flight.pop(trace.id, None)
+
+    def _run(self):
+        while not self._stop.is_set():
+            now = time.perf_counter()
+            # Sleep until the oldest request crosses the threshold; anything
+            # registered while asleep crosses it later than that
+            wait = self.threshold
+            with self._lock:
+                frames = None
+                for trace in self._in_flight.values():
+                    deadline = trace.started + self.threshold
+                    if deadline > now:
+                        wait = min(wait, deadline - now)
+                        continue
+                    if frames is None:
+                        frames = sys._current_frames()
+                    frame = frames.get(trace.thread_id)
+                    if frame is not None:
+                        trace.add_sample(frame)
+                    wait = self.interval
+                del frames
+            self._stop.wait(max(wait, self.interval))
+
+
+class ProfilingMiddleware:
+    """Pure ASGI middleware that profiles selected requests and samples slow ones"""
+
+    def __init__(self, app, store, sampler=None, paths=PROFILE_PATHS,
+                 header_enabled=PROFILE_HEADER_ENABLED, sample_rate=PROFILE_SAMPLE_RATE,
+                 slow_exclude=SLOW_REQUEST_EXCLUDE):
+        self.app = app
+        self.store = store
+        self.sampler = sampler
+        self.paths = frozenset(paths)
+        self.slow_exclude = tuple(slow_exclude)
+        self.header_enabled = header_enabled
+        self.sample_rate = sample_rate
+        self._ids = itertools.count(1)
+        # cProfile hooks are per thread: one profiled request per worker at a time
+        self._profile_lock = threading.Lock()
+
+    def _trigger(self, scope):
+        if scope["path"] not in self.paths:
+            return None
+        if self.header_enabled and (PROFILE_HEADER, b"1") in scope["headers"]:
+            return "header"
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return "sample"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trigger = self._trigger(scope)
+        if trigger is not None and not self._profile_lock.acquire(blocking=False):
+            trigger = None
+        trace = RequestTrace(next(self._ids), scope["method"], scope["path"], trigger)
+        scope.setdefault("state", {})["request_trace"] = trace
+        sampler = None if scope["path"].startswith(self.slow_exclude) else self.sampler
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if trace.profiled:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"x-profile-id", str(trace.id).encode()))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        if sampler is not None:
+            sampler.register(trace)
+        if trace.profiled:
+            trace.profilers[0].enable()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if trace.profiled:
+                trace.profilers[0].disable()
+                self._profile_lock.release()
+            if sampler is not None:
+                sampler.unregister(trace)
+            duration = time.perf_counter() - trace.started
+            slow = sampler is not None and duration >= sampler.threshold
+            if trace.profiled or slow:
+                self._store(trace, status_code, duration)
+
+    def _store(self, trace, status_code, duration):
+        sample_count = sum(trace.samples.values())
+        record = {
+            "id": trace.id,
+            "timestamp": time.time(),
+            "method": trace.method,
+            "path": trace.path,
+            "status": status_code,
+            "duration_ms": round(duration * 1000, 3),
+            "trigger": trace.trigger or "slow",
+            "samples": sample_count,
+            "stacks": [
+                {"count": count, "share": round(count / sample_count, 4), "stack": list(stack)}
+                for stack, count in trace.samples.most_common(PROFILE_MAX_STACKS)
+            ],
+        }
+        if trace.profiled:
+            record.update(top_frames(trace.profilers))
+        self.store.add(record)
+        if not trace.profiled:
+            logger.warning(
+                f"Slow request {trace.method} {trace.path}: {record['duration_ms']:.1f} ms "
+                f"({sample_count} stack samples, profile {trace.id})"
+            )
@@ -0,0 +1,85 @@
+"""
+Request and response models shared by the API and the tooling around it.
+"""
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+
+class PatientData(BaseModel):
+    Pregnancies: int = Field(..., ge=0, le=20, description="Number of times pregnant")
+    Glucose: float = Field(..., ge=0, le=300, description="Plasma glucose concentration (mg/dL)")
+    BloodPressure: float = Field(..., ge=0, le=200, description="Diastolic blood pressure (mmHg)")
+    SkinThickness: float = Field(..., ge=0, le=100, description="Triceps skin fold thickness (mm)")
+    Insulin: float = Field(..., ge=0, le=900, description="2-Hour serum insulin (mu U/ml)")
+    BMI: float = Field(..., ge=0, le=70, description="Body Mass Index (weight in kg/(height in m)^2)")
+    DiabetesPedigreeFunction: float = Field(..., ge=0, le=3, description="Diabetes pedigree function score")
+    Age: int = Field(..., ge=1, le=120, description="Age in years")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "Pregnancies": 6,
+                "Glucose": 148,
+                "BloodPressure": 72,
+                "SkinThickness": 35,
+                "Insulin": 0,
+                "BMI": 33.6,
+                "DiabetesPedigreeFunction": 0.627,
+                "Age": 50
+            }
+        }
+
+
+class HealthResponse(BaseModel):
+    message: str
+    model_loaded: bool
+    scaler_loaded: bool
+
+
+class Prediction(BaseModel):
+    prediction: int = Field(..., description="0 = No Diabetes, 1 = Diabetes")
+    probability: float = Field(..., ge=0, le=1, description="Probability score from 0 to 1")
+    predicted_outcome: str = Field(..., description="Human-readable prediction result")
+
+
+class PredictionResponse(Prediction):
+    model_version: Optional[str] = Field(None, description="Version of the model that made the prediction")
+
+    class Config:
+        # model_version is a field name, not pydantic API
+        protected_namespaces = ()
+
+
+class BatchPredictionRequest(BaseModel):
+    patients: List[PatientData] = Field(..., min_length=1, description="Patients to score, results are returned in the same order")
+
+
+class BatchPredictionResponse(BaseModel):
+    count: int = Field(..., description="Number of patients scored")
+    predictions: List[Prediction]
+    model_version: Optional[str] = Field(None, description="Version of the model that scored the batch")
+
+    class Config:
+        # model_version is a field name, not pydantic API
+        protected_namespaces = ()
+
+
+class JobStatus(BaseModel):
+    job_id: str
+    status: str = Field(..., description="receiving, queued, running, succeeded, failed or cancelled")
+    input_format: str
+    output_format: str
+    rows_total: Optional[int] = Field(None, description="Known once the job starts")
+    rows_done: int = 0
+    rows_rejected: int = 0
+    progress: float = Field(0.0, ge=0, le=1)
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+    result_url: Optional[str] = Field(None, description="Set once the job has succeeded")
+    model_version: Optional[str] = Field(None, description="Version of the model scoring the job, set when it starts")
+
+    class Config:
+        # model_version is a field name, not pydantic API
+        protected_namespaces = ()
@@ -0,0 +1,691 @@
+"""
+Diabetes Prediction API.
+
+One FastAPI app for every model. The inference backend is picked at startup
+with MODEL_BACKEND (see backends.py); main.py, main_sklearn.py and
+main_savedmodel.py are entry points that only choose a default backend.
+"""
+from fastapi import Depends, FastAPI, HTTPException, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from backends import BACKENDS, MODEL_BACKEND, create_backend
+from batching import MicroBatcher, BATCHER_ENABLED
+from compact import JsonFormat, add_model_schemas, compact_format, openapi_request_body, read_model, read_rows
+from executor import InferenceExecutor, limit_native_threads
+from features import INPUT_PATH, RowBuffer, features_to_array, field_bounds
+from hot_reload import ModelReloader, ReloadInProgress
+from jobs import (
+    JOB_REQUEST_BODY, TERMINAL_STATES, JobQueue, JobStore, accept_job, public_status, status_events
+)
+from metrics import CONTENT_TYPE, METRICS_ENABLED, ApiMetrics, MetricsMiddleware, stage_clock
+from prediction_cache import CACHE_ENABLED, PredictionCache
+from profiling import (
+    PROFILING_ENABLED, SLOW_REQUEST_MS, ProfileStore, ProfilingMiddleware, SlowRequestSampler, profiled
+)
+from process_stats import memory_usage
+from shadow import SHADOW_BACKEND, ShadowScorer
+from schemas import (
+    BatchPredictionRequest, BatchPredictionResponse, HealthResponse, JobStatus, PatientData, PredictionResponse
+)
+from streaming import OPENAPI_REQUEST_BODY, stream_predictions
+from startup import BackgroundLoader, FAST_START
+from warmup import WARMUP_ENABLED
+from validation import ColumnarValidator
+from typing import Optional
+import asyncio
+import importlib
+import os
+import logging
+import sys
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    stream=sys.stdout
+)
+logger = logging.getLogger(__name__)
+
+logger.info("=" * 80)
+logger.info("DIABETES PREDICTION API - STARTUP")
+logger.info("=" * 80)
+logger.info(f"Python Version: {sys.version}")
+logger.info(f"Current Working Directory: {os.getcwd()}")
+logger.info(f"Inference backend: {MODEL_BACKEND}")
+logger.info("=" * 80)
+
+backend = create_backend(MODEL_BACKEND)
+
+app = FastAPI(
+    title=backend.title,
+    description=backend.description,
+    version="1.0.0",
+    docs_url="/docs",
+    redoc_url="/redoc"
+)
+
+# CORS
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+batcher = None
+row_buffer = RowBuffer()
+# Checks whole batches against the PatientData bounds in one NumPy pass
+validator = ColumnarValidator(PatientData)
+
+# Fixed pool of inference threads; prediction endpoints are async and queue their compute here
+inference = InferenceExecutor()
+
+# Answers repeated identical patients without scaling or inference
+prediction_cache = PredictionCache() if CACHE_ENABLED else None
+
+# Request counts, error counts and per-stage latency histograms for /metrics
+metrics = ApiMetrics() if METRICS_ENABLED else None
+
+# Captured cProfile tables and slow-request stack samples for /admin/profiles
+profile_store = ProfileStore() if PROFILING_ENABLED else None
+slow_sampler = SlowRequestSampler() if PROFILING_ENABLED and SLOW_REQUEST_MS > 0 else None
+
+# Long-running batches scored in the background (POST /jobs)
+JOBS_ENABLED = os.getenv("JOBS_ENABLED", "1") == "1"
+job_store = JobStore() if JOBS_ENABLED else None
+
+def job_model():
+    """predict_fn and version of the active backend; a job keeps both until it finishes"""
+    model = backend
+    return inference.background(model.predict_batch), model.version
+
+job_queue = JobQueue(job_store, job_model) if JOBS_ENABLED else None
+
+# Set ADMIN_TOKEN to require an X-Admin-Token header on /admin endpoints
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+# Batch scoring limits
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "1000"))
+
+def prepare_backend(candidate, timed_import=importlib.import_module):
+    """Load a backend and warm it up; returns True once it can serve"""
+    if not candidate.load(timed_import):
+        return False
+
+    logger.info("✓✓✓ MODEL LOADED AND READY ✓✓✓")
+    logger.info(f"Backend: {candidate.describe()}")
+    logger.info(f"Worker memory: {memory_usage()}")
+    limit_native_threads(candidate.model, getattr(candidate, "serving_model", None))
+    if WARMUP_ENABLED:
+        candidate.warm_up(field_bounds(PatientData))
+    return True
+
+def activate_backend(candidate):
+    """
+    Make a prepared backend the one new requests use, with its own
+    micro-batcher; returns a callable that drains the previous batcher
+    """
+    global backend, batcher
+    previous_batcher = batcher
+    new_batcher = None
+    if BATCHER_ENABLED:
+        new_batcher = MicroBatcher(candidate.predict_batch)
+        new_batcher.start()
+
+    backend, batcher = candidate, new_batcher
+    if prediction_cache is not None:
+        prediction_cache.set_version(candidate.version)
+    if metrics is not None:
+        metrics.model_info.clear()
+        metrics.model_info.set(1, (candidate.name, str(candidate.version)))
+    # Rows already queued on the old batcher are still scored by the old model
+    return previous_batcher.stop if previous_batcher is not None else None
+
+def load_backend():
+    """Load the configured backend at startup, warm it up and start serving it"""
+    if not prepare_backend(backend, loader.timed_import):
+        return False
+    activate_backend(backend)
+    reloader.mark_loaded()
+    return True
+
+def load_replacement():
+    """Fresh instance of the configured backend loaded from the current files, or None"""
+    candidate = create_backend(MODEL_BACKEND)
+    return candidate if prepare_backend(candidate) else None
+
+loader = BackgroundLoader(load_backend, name=backend.name)
+
+# Swaps in a new model (POST /admin/reload or MODEL_WATCH_SECONDS) without a restart
+reloader = ModelReloader(load_replacement, activate_backend, lambda: backend)
+
+# Secondary model scoring a sample of /predict traffic for comparison (SHADOW_BACKEND)
+shadow = None
+shadow_loader = None
+if SHADOW_BACKEND:
+    shadow_backend = create_backend(SHADOW_BACKEND)
+    shadow = ShadowScorer(shadow_backend, inference.call_background)
+    shadow_loader = BackgroundLoader(lambda: prepare_backend(shadow_backend), name=f"shadow {shadow_backend.name}")
+
+def shadow_row(input_array):
+    """Copy of the raw features when this request is sampled for shadow scoring, else None"""
+    if shadow is None or not shadow.sample():
+        return None
+    return input_array[0].copy()
+
+def require_model():
+    """Raise 503 until the backend has a model and scaler to serve with"""
+    if not backend.loaded:
+        raise HTTPException(
+            status_code=503,
+            detail={
+                "error": "Model or scaler not loaded",
+                "model_loaded": backend.model is not None,
+                "scaler_loaded": backend.scaler is not None,
+                "loading_state": loader.state
+            }
+        )
+
+def require_admin(request):
+    """Raise 403 unless the request carries ADMIN_TOKEN (when one is configured)"""
+    if ADMIN_TOKEN and request.headers.get("x-admin-token") != ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+def format_prediction(probability):
+    """Build the response payload for one probability"""
+    prediction = 1 if probability >= 0.5 else 0
+    return {
+        "prediction": prediction,
+        "probability": probability,
+        "predicted_outcome": "Diabetes" if prediction == 1 else "No Diabetes"
+    }
+
+def versioned(payload, model):
+    """Tag a response payload with the version of the model that produced it"""
+    payload["model_version"] = model.version
+    return payload
+
+@app.on_event("startup")
+async def startup_event():
+    logger.info("Starting Diabetes Prediction API...")
+    inference.start()
+    # Slow backends (TensorFlow) load in the background so / answers right away
+    background = FAST_START and backend.background_load
+    logger.info(f"Loading {backend.name} backend ({'background' if background else 'blocking'})")
+    loader.start(background=background)
+    reloader.start(asyncio.get_running_loop())
+    if shadow is not None:
+        # Never delays startup: samples are dropped until the shadow model is loaded
+        shadow_loader.start(background=True)
+        shadow.start()
+    if slow_sampler is not None:
+        slow_sampler.start()
+    if job_queue is not None:
+        job_store.cleanup()
+        job_queue.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    reloader.stop()
+    if shadow is not None:
+        shadow.stop()
+    if batcher is not None:
+        batcher.stop()
+    if slow_sampler is not None:
+        slow_sampler.stop()
+    if job_queue is not None:
+        job_queue.stop()
+    inference.stop()
+
+# Endpoints
+@app.get("/", response_model=HealthResponse, tags=["Health"])
+def root():
+    """Health check endpoint"""
+    return {
+        "message": "Diabetes Prediction API is running 🚀",
+        "model_loaded": backend.model is not None,
+        "scaler_loaded": backend.scaler is not None
+    }
+
+@app.get("/livez", tags=["Health"])
+def livez():
+    """Liveness probe: the process is up and serving HTTP"""
+    return {"status": "alive"}
+
+@app.get("/readyz", tags=["Health"])
+def readyz():
+    """Readiness probe: model loaded and warmed up"""
+    if not loader.ready:
+        raise HTTPException(
+            status_code=503,
+            detail={
+                "status": "not ready",
+                "loading_state": loader.state,
+                "model_loaded": backend.model is not None,
+                "scaler_loaded": backend.scaler is not None
+            }
+        )
+    return {
+        "status": "ready",
+        "backend": backend.name,
+        "model_version": backend.version,
+        "warmup": backend.warmup_report,
+        "startup": loader.status()
+    }
+
+@app.get("/startup", tags=["Health"])
+def startup_status():
+    """Backend loading state and per-module import times"""
+    return loader.status()
+
+@app.get("/backend", tags=["Health"])
+def backend_info():
+    """Active inference backend and the ones available via MODEL_BACKEND"""
+    return {**backend.describe(), "available": sorted(BACKENDS)}
+
+async def patient_body(request: Request):
+    """
+    /predict body by Content-Type: (PatientData, JsonFormat) for JSON, or a
+    checked raw (1, 8) row and its CompactFormat for MessagePack and float32
+    """
+    body_format = compact_format(request.headers.get("content-type"))
+    body = await request.body()
+    if isinstance(body_format, JsonFormat):
+        return read_model(body_format, body, PatientData), body_format
+    return read_rows(body_format, body, True, validator), body_format
+
+async def patient_rows(request: Request):
+    """/predict/batch body in any encoding as checked raw (n, 8) rows, and its format"""
+    body_format = compact_format(request.headers.get("content-type"))
+    body = await request.body()
+    return read_rows(body_format, body, False, validator, max_rows=MAX_BATCH_SIZE), body_format
+
+@app.post("/predict", response_model=PredictionResponse, tags=["Predictions"],
+          openapi_extra=openapi_request_body(PatientData))
+async def predict(request: Request, body: tuple = Depends(patient_body)):
+    """
+    Make a diabetes prediction based on patient medical data.
+
+    Returns a probability score and binary prediction. Also accepts
+    `application/x-msgpack` and `application/x-float32` bodies, answered in
+    the same encoding (see compact.py).
+    """
+    data, body_format = body
+    clock = stage_clock(request)
+    clock.lap("validation")
+    require_model()
+    # Read once: a hot reload swaps both, and this request stays on the model it started with
+    model, model_batcher = backend, batcher
+    if isinstance(data, PatientData):
+        if model_batcher is not None:
+            return await predict_batched(model, model_batcher, features_to_array([data]), clock)
+        return await inference.run(score_patient, model, data, request=request)
+
+    # MessagePack or float32: already a fresh (1, 8) row, answered in the same encoding
+    if model_batcher is not None:
+        payload = await predict_batched(model, model_batcher, data, clock)
+    else:
+        payload = await inference.run(score_row, model, data, request=request)
+    return body_format.prediction(payload)
+
+@profiled
+def score_patient(model, data, request):
+    """Features, cache, scaling and inference for /predict; runs on an inference thread"""
+    clock = stage_clock(request)
+    clock.lap("queue")
+    # Fields go straight into a reused (1, 8) buffer in FEATURE_NAMES order
+    input_array = row_buffer.fill(data)
+    clock.lap("features")
+    return predict_row(model, input_array, clock, data)
+
+@profiled
+def score_row(model, input_array, request):
+    """/predict for a MessagePack or float32 (1, 8) row; runs on an inference thread"""
+    clock = stage_clock(request)
+    clock.lap("queue")
+    return predict_row(model, input_array, clock)
+
+def predict_row(model, input_array, clock, data=None):
+    """Cache, scaling and inference of one raw (1, 8) row"""
+    try:
+        sampled = shadow_row(input_array)
+
+        # Key on the raw features: the fused scaler transforms the array in place
+        cache_key = None
+        if prediction_cache is not None:
+            cache_key = prediction_cache.key(input_array, model.version)
+            cached = prediction_cache.get(cache_key)
+            clock.lap("cache")
+            if cached is not None:
+                if sampled is not None:
+                    shadow.submit(sampled, cached, model.version)
+                return versioned(format_prediction(cached), model)
+
+        if INPUT_PATH == "dataframe" and data is not None:
+            import pandas as pd
+            probability = float(model.predict_frame(pd.DataFrame([data.dict()]))[0])
+        else:
+            input_scaled = model.scale(input_array)
+            clock.lap("scaling")
+            probability = float(model.infer(input_scaled)[0])
+        clock.lap("inference")
+
+        if prediction_cache is not None:
+            prediction_cache.put(cache_key, probability)
+        if sampled is not None:
+            # Scored later by the shadow thread; never waited for here
+            shadow.submit(sampled, probability, model.version)
+        return versioned(format_prediction(probability), model)
+    except Exception as e:
+        logger.error(f"Prediction error: {e}")
+        raise HTTPException(status_code=500, detail="Prediction failed")
+
+async def predict_batched(model, model_batcher, input_array, clock):
+    """
+    /predict through the micro-batcher: concurrent requests share one
+    scaler/model call on the batcher thread, so nothing waits on an inference thread.
+    input_array must be a fresh (1, 8) row: the batcher reads it after this coroutine has yielded
+    """
+    with inference.admission():
+        try:
+            sampled = shadow_row(input_array)
+            clock.lap("features")
+
+            cache_key = None
+            if prediction_cache is not None:
+                cache_key = prediction_cache.key(input_array, model.version)
+                cached = prediction_cache.get(cache_key)
+                clock.lap("cache")
+                if cached is not None:
+                    if sampled is not None:
+                        shadow.submit(sampled, cached, model.version)
+                    return versioned(format_prediction(cached), model)
+
+            probability = await asyncio.wrap_future(model_batcher.enqueue(input_array[0]))
+            clock.lap("inference")
+
+            if prediction_cache is not None:
+                prediction_cache.put(cache_key, probability)
+            if sampled is not None:
+                shadow.submit(sampled, probability, model.version)
+            return versioned(format_prediction(probability), model)
+        except Exception as e:
+            logger.error(f"Prediction error: {e}")
+            raise HTTPException(status_code=500, detail="Prediction failed")
+
+@app.post("/predict/batch", response_model=BatchPredictionResponse, tags=["Predictions"],
+          openapi_extra=openapi_request_body(BatchPredictionRequest))
+async def predict_batch(request: Request, body: tuple = Depends(patient_rows)):
+    """
+    Score a list of patients in one vectorized pass.
+
+    Results are returned in the same order as the submitted patients. The
+    whole batch is validated in one vectorized pass; invalid patients get the
+    usual 422 errors. Also accepts `application/x-msgpack` and
+    `application/x-float32` (N x 8) bodies, answered in the same encoding
+    (see compact.py).
+    """
+    input_array, body_format = body
+    clock = stage_clock(request)
+    clock.lap("validation")
+    require_model()
+    model = backend
+    probabilities = await inference.run(score_rows, model, input_array, request=request)
+    return body_format.predictions(probabilities, model.version)
+
+@profiled
+def score_rows(model, input_array, request):
+    """Vectorized scoring of decoded (n, 8) rows for /predict/batch; runs on an inference thread"""
+    clock = stage_clock(request)
+    clock.lap("queue")
+    return predict_rows(model, input_array, clock)
+
+def predict_rows(model, input_array, clock):
+    """Probabilities of raw (n, 8) rows, scaled and scored in a single call"""
+    try:
+        input_scaled = model.scale(input_array)
+        clock.lap("scaling")
+        probabilities = model.infer(input_scaled)
+        clock.lap("inference")
+        return probabilities
+    except Exception as e:
+        logger.error(f"Batch prediction error: {e}")
+        raise HTTPException(status_code=500, detail="Prediction failed")
+
+@app.post("/predict/stream", tags=["Predictions"], openapi_extra=OPENAPI_REQUEST_BODY)
+async def predict_stream(request: Request, format: Optional[str] = None):
+    """
+    Score an NDJSON or CSV body of any size, streaming results back as they are scored.
+
+    Send `Content-Type: application/x-ndjson` (one patient object or 8-number
+    array per line) or `text/csv` (header row with the PatientData fields).
+    Results come back in the same format unless `format=ndjson|csv` is given.
+    """
+    require_model()
+    # The whole stream is scored by the model active when it started
+    model = backend
+    # Chunks are scored as background work, after any waiting /predict calls
+    predict_fn = inference.background(model.predict_batch)
+    response = await stream_predictions(request, predict_fn, validator, format)
+    response.headers["X-Model-Version"] = str(model.version)
+    return response
+
+def get_job(job_id):
+    """Status of a job, or 404"""
+    if job_store is None:
+        raise HTTPException(status_code=404, detail="Jobs are disabled (JOBS_ENABLED=0)")
+    status = job_store.load(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return status
+
+@app.post("/jobs", status_code=202, response_model=JobStatus, tags=["Jobs"], openapi_extra=JOB_REQUEST_BODY)
+async def submit_job(request: Request, response: Response, format: Optional[str] = None):
+    """
+    Queue a large batch for background scoring and return its job ID immediately.
+
+    Accepts a JSON `{"patients": [...]}` body, NDJSON or CSV (as for
+    /predict/stream). Poll `/jobs/{job_id}` or follow `/jobs/{job_id}/events`,
+    then download `/jobs/{job_id}/result`.
+    """
+    if job_queue is None:
+        raise HTTPException(status_code=404, detail="Jobs are disabled (JOBS_ENABLED=0)")
+    require_model()
+    status = await accept_job(request, job_store, job_queue, format)
+    response.headers["Location"] = f"/jobs/{status['job_id']}"
+    return public_status(status)
+
+@app.get("/jobs/stats", tags=["Jobs"])
+def job_stats():
+    """Job workers, queue depth and completed/failed counts of this worker process"""
+    if job_queue is None:
+        return {"enabled": False}
+    return {"enabled": True, **job_queue.stats()}
+
+@app.get("/jobs/{job_id}", response_model=JobStatus, tags=["Jobs"])
+def job_status(job_id: str):
+    """Job state and progress"""
+    return public_status(get_job(job_id))
+
+@app.get("/jobs/{job_id}/events", tags=["Jobs"])
+async def job_events(job_id: str):
+    """NDJSON stream of the job's status, one line per change, ending when the job finishes"""
+    get_job(job_id)
+    return StreamingResponse(status_events(job_store, job_id), media_type="application/x-ndjson")
+
+@app.get("/jobs/{job_id}/result", tags=["Jobs"])
+def job_result(job_id: str):
+    """Scored rows of a succeeded job (same records as /predict/stream)"""
+    status = get_job(job_id)
+    if status["status"] != "succeeded":
+        raise HTTPException(status_code=409, detail=f"Job {job_id} is {status['status']}, no result available")
+    output_format = status["output_format"]
+    return FileResponse(
+        job_store.result_path(status),
+        media_type="text/csv" if output_format == "csv" else "application/x-ndjson",
+        filename=f"{job_id}.{output_format}",
+        headers={"X-Model-Version": str(status["model_version"])}
+    )
+
+@app.delete("/jobs/{job_id}", tags=["Jobs"])
+def delete_job(job_id: str):
+    """Cancel a queued or running job, or delete a finished one and its result"""
+    status = get_job(job_id)
+    if status["status"] in TERMINAL_STATES:
+        job_store.delete(job_id)
+        return {"job_id": job_id, "deleted": True}
+    job_store.request_cancel(job_id)
+    return {"job_id": job_id, "deleted": False, "cancelling": True}
+
+@app.get("/batcher/stats", tags=["Monitoring"])
+def batcher_stats():
+    """Micro-batcher queue depth and batch-size histogram"""
+    if batcher is None:
+        return {"enabled": False}
+    return {"enabled": True, **batcher.stats()}
+
+@app.get("/inference/stats", tags=["Monitoring"])
+def inference_stats():
+    """Inference thread pool size, queue depth and admission (429/503) counters"""
+    return inference.stats()
+
+@app.get("/shadow/stats", tags=["Monitoring"])
+def shadow_stats():
+    """Shadow model agreement rate, probability deltas and latency against the serving model"""
+    if shadow is None:
+        return {"enabled": False}
+    return {"enabled": True, "loading_state": shadow_loader.state, **shadow.stats()}
+
+@app.delete("/shadow/stats", tags=["Monitoring"])
+def reset_shadow_stats(request: Request):
+    """Start a fresh shadow comparison window"""
+    require_admin(request)
+    if shadow is not None:
+        shadow.reset()
+    return {"reset": shadow is not None}
+
+@app.get("/cache/stats", tags=["Monitoring"])
+def cache_stats():
+    """Prediction cache size and hit/miss/eviction counters"""
+    if prediction_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **prediction_cache.stats()}
+
+@app.get("/process", tags=["Monitoring"])
+def process_info():
+    """Memory usage (RSS/PSS) of the worker process that served this request"""
+    return {
+        **memory_usage(),
+        "backend": backend.name,
+        "model_source": backend.source,
+        "model_version": backend.version
+    }
+
+@app.get("/metrics", tags=["Monitoring"])
+def prometheus_metrics():
+    """Request, error and per-stage latency metrics in Prometheus text format"""
+    if metrics is None:
+        raise HTTPException(status_code=404, detail="Metrics are disabled (METRICS_ENABLED=0)")
+    return Response(content=metrics.render(), media_type=CONTENT_TYPE)
+
+@app.post("/admin/reload", status_code=202, tags=["Admin"])
+def reload_model(request: Request, force: bool = False):
+    """
+    Load the model files again in the background and swap the new model in once it is warm.
+
+    Requests keep being served by the current model until the swap, and
+    requests already running finish on it. The swap is skipped when the
+    version did not change, unless `force=true`. Poll `GET /admin/reload`.
+    """
+    require_admin(request)
+    if not loader.ready:
+        raise HTTPException(status_code=409, detail=f"Initial model load is {loader.state}")
+    try:
+        return reloader.request(trigger="admin", force=force)
+    except ReloadInProgress as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@app.get("/admin/reload", tags=["Admin"])
+def reload_status(request: Request):
+    """Hot-reload state, active model version and the last reload attempt"""
+    require_admin(request)
+    return reloader.status()
+
+@app.get("/admin/profiles", tags=["Admin"])
+def list_profiles(request: Request):
+    """Captured request profiles and slow-request samples, newest first"""
+    require_admin(request)
+    if profile_store is None:
+        return {"enabled": False}
+    return {
+        "enabled": True,
+        "slow_request_ms": SLOW_REQUEST_MS if slow_sampler is not None else None,
+        "captured": profile_store.captured,
+        "profiles": profile_store.summaries()
+    }
+
+@app.get("/admin/profiles/{profile_id}", tags=["Admin"])
+def get_profile(profile_id: int, request: Request):
+    """Top cProfile frames and/or most frequent stacks of one captured request"""
+    require_admin(request)
+    record = profile_store.get(profile_id) if profile_store is not None else None
+    if record is None:
+        raise HTTPException(status_code=404, detail=f"Profile {profile_id} not found (or already evicted)")
+    return record
+
+@app.delete("/admin/profiles", tags=["Admin"])
+def clear_profiles(request: Request):
+    """Drop all captured profiles"""
+    require_admin(request)
+    if profile_store is not None:
+        profile_store.clear()
+    return {"cleared": True}
+
+def openapi():
+    """OpenAPI schema, with the body models of the routes that read their own body"""
+    if app.openapi_schema is None:
+        add_model_schemas(FastAPI.openapi(app), [PatientData, BatchPredictionRequest])
+    return app.openapi_schema
+
+app.openapi = openapi
+
+if profile_store is not None:
+    app.add_middleware(ProfilingMiddleware, store=profile_store, sampler=slow_sampler)
+
+if metrics is not None:
+    metrics.gauge(
+        "diabetes_api_batcher_queue_depth", "Rows waiting in the micro-batcher queue",
+        lambda: batcher.stats()["queue_depth"] if batcher is not None else 0)
+    metrics.gauge(
+        "diabetes_api_inference_pending", "Interactive predictions queued or running on inference threads",
+        lambda: inference.pending)
+    metrics.gauge(
+        "diabetes_api_inference_queue_depth", "Work items waiting for an inference thread",
+        lambda: inference.stats()["queue_depth"])
+    if shadow is not None:
+        metrics.gauge(
+            "diabetes_api_shadow_agreement_ratio", "Share of shadowed rows where both models predict the same class",
+            lambda: shadow.stats()["agreement_rate"])
+        metrics.gauge(
+            "diabetes_api_shadow_mean_abs_delta", "Mean |shadow - primary| probability of shadowed rows",
+            lambda: shadow.stats()["delta"]["mean_abs"])
+        metrics.gauge(
+            "diabetes_api_shadow_compared_rows", "Shadowed rows compared since the last reset or model swap",
+            lambda: shadow.stats()["compared"])
+        metrics.gauge(
+            "diabetes_api_shadow_dropped_rows", "Sampled rows dropped because the shadow queue was full",
+            lambda: shadow.dropped)
+    metrics.gauge(
+        "diabetes_api_model_load_seconds", "Time taken to load and warm up the backend",
+        lambda: loader.load_seconds)
+    def resident_memory_bytes():
+        # Peak RSS where /proc/self/smaps_rollup is unavailable (not Linux)
+        stats = memory_usage()
+        return int(stats.get("rss_mb", stats.get("max_rss_mb")) * 1024 * 1024)
+
+    metrics.gauge(
+        "diabetes_api_process_resident_memory_bytes", "Resident set size of this worker process",
+        resident_memory_bytes)
+    # Outermost middleware, so it also times CORS and error handling
+    app.add_middleware(MetricsMiddleware, metrics=metrics, endpoints=[route.path for route in app.routes])
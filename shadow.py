@@ -0,0 +1,252 @@
+"""
+Shadow scoring of live /predict traffic with a second backend.
+
+Set SHADOW_BACKEND (e.g. "keras" while serving "sklearn") to compare two
+models on real inputs without touching the response. A SHADOW_SAMPLE_RATE
+fraction of /predict rows is copied, together with the served probability,
+into a bounded queue; a shadow thread drains it in batches of up to
+SHADOW_BATCH_ROWS and scores them with the secondary backend as background
+work on the inference executor, so shadow scoring only uses CPU that
+interactive requests are not waiting for. When the queue is full (or the
+secondary model is still loading) samples are dropped and counted, never
+waited for.
+
+Per primary model version the comparison keeps:
+
+- agreement rate of the 0/1 predictions and the 2x2 prediction table
+- signed and absolute probability deltas (shadow - primary) with a histogram
+- secondary model latency per batch and the lag from response to comparison
+
+All of it lives in memory (per worker process) and is served by
+GET /shadow/stats.
+"""
+from bisect import bisect_left
+from collections import deque
+from features import N_FEATURES
+import numpy as np
+import logging
+import os
+import queue
+import random
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Secondary backend name (see backends.py); empty disables shadow scoring
+SHADOW_BACKEND = os.getenv("SHADOW_BACKEND", "").lower()
+SHADOW_SAMPLE_RATE = float(os.getenv("SHADOW_SAMPLE_RATE", "0.1"))
+SHADOW_QUEUE_SIZE = int(os.getenv("SHADOW_QUEUE_SIZE", "1024"))
+SHADOW_BATCH_ROWS = int(os.getenv("SHADOW_BATCH_ROWS", "64"))
+
+# Upper bounds of the |shadow - primary| probability histogram
+DELTA_BUCKETS = (0.001, 0.01, 0.05, 0.1, 0.2, 0.5, 1.0)
+# Recent batches kept for latency percentiles
+_LATENCY_WINDOW = 1000
+
+
+def _percentiles(values):
+    if not values:
+        return {"p50": None, "p95": None, "p99": None}
+    p50, p95, p99 = np.percentile(np.fromiter(values, dtype=np.float64), [50, 95, 99])
+    return {"p50": round(p50, 4), "p95": round(p95, 4), "p99": round(p99, 4)}
+
+
+class ShadowStats:
+    """Agreement, probability deltas and latency of the shadow model against one primary version"""
+
+    def __init__(self, primary_version=None):
+        self.primary_version = primary_version
+        self.since = time.time()
+        self.compared = 0
+        self.agreed = 0
+        # [primary prediction][shadow prediction]
+        self.table = [[0, 0], [0, 0]]
+        self.delta_sum = 0.0
+        self.abs_delta_sum = 0.0
+        self.max_abs_delta = 0.0
+        self.delta_counts = [0] * len(DELTA_BUCKETS)
+        self.batches = 0
+        self.latency_ms = deque(maxlen=_LATENCY_WINDOW)
+        self.row_latency_ms_sum = 0.0
+        self.lag_ms = deque(maxlen=_LATENCY_WINDOW)
+
+    def record(self, primary, shadow, seconds, lag_seconds):
+        """Add one scored batch: primary and shadow probability arrays of equal length"""
+        delta = shadow - primary
+        abs_delta = np.abs(delta)
+        primary_class = (primary >= 0.5).astype(np.intp)
+        shadow_class = (shadow >= 0.5).astype(np.intp)
+        n = len(primary)
+
+        self.compared += n
+        self.agreed += int(np.count_nonzero(primary_class == shadow_class))
+        for i in (0, 1):
+            for j in (0, 1):
+                self.table[i][j] += int(np.count_nonzero((primary_class == i) & (shadow_class == j)))
+        self.delta_sum += float(delta.sum())
+        self.abs_delta_sum += float(abs_delta.sum())
+        self.max_abs_delta = max(self.max_abs_delta, float(abs_delta.max()))
+        for value in abs_delta.tolist():
+            self.delta_counts[min(bisect_left(DELTA_BUCKETS, value), len(DELTA_BUCKETS) - 1)] += 1
+        self.batches += 1
+        self.latency_ms.append(seconds * 1000)
+        self.row_latency_ms_sum += seconds * 1000
+        self.lag_ms.append(lag_seconds * 1000)
+
+    def summary(self):
+        compared = self.compared
+        return {
+            "primary_version": self.primary_version,
+            "since": self.since,
+            "compared": compared,
+            "agreement_rate": self.agreed / compared if compared else None,
+            "predictions": {
+                "both_0": self.table[0][0],
+                "primary_0_shadow_1": self.table[0][1],
+                "primary_1_shadow_0": self.table[1][0],
+                "both_1": self.table[1][1],
+            },
+            "delta": {
+                "mean": self.delta_sum / compared if compared else None,
+                "mean_abs": self.abs_delta_sum / compared if compared else None,
+                "max_abs": self.max_abs_delta if compared else None,
+                "abs_histogram": {f"le_{bound:g}": count for bound, count in zip(DELTA_BUCKETS, self.delta_counts)},
+            },
+            "latency_ms": {
+                "batches": self.batches,
+                "mean_batch_rows": compared / self.batches if self.batches else None,
+                "per_row_mean": self.row_latency_ms_sum / compared if compared else None,
+                "batch": _percentiles(self.latency_ms),
+            },
+            "lag_ms": _percentiles(self.lag_ms),
+        }
+
+
+class ShadowScorer:
+    """Bounded queue of sampled rows scored by a secondary backend on a background thread"""
+
+    def __init__(self, backend, call=None, sample_rate=SHADOW_SAMPLE_RATE,
+                 queue_size=SHADOW_QUEUE_SIZE, batch_rows=SHADOW_BATCH_ROWS):
+        self.backend = backend
+        # call(fn, *args) runs the scoring (e.g. on the inference executor); default: inline
+        self.call = call or (lambda fn, *args: fn(*args))
+        self.sample_rate = sample_rate
+        self.batch_rows = max(1, int(batch_rows))
+        self._queue = queue.Queue(maxsize=max(1, int(queue_size)))
+        self._thread = None
+        self._running = False
+        self._lock = threading.Lock()
+        self._stats = ShadowStats()
+
+        # Counters
+        self.sampled = 0
+        self.dropped = 0
+        self.not_ready = 0
+        self.errors = 0
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="shadow-scorer", daemon=True)
+        self._thread.start()
+        logger.info(
+            f"✓ Shadow scoring started ({self.backend.name}, sample_rate={self.sample_rate}, "
+            f"queue={self._queue.maxsize})"
+        )
+
+    def stop(self):
+        if not self._running:
+            return
+        self._running = False
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass
+
+    def sample(self):
+        """Whether to shadow the current request (cheap; call before copying anything)"""
+        return self._running and random.random() < self.sample_rate
+
+    def submit(self, row, probability, primary_version):
+        """Queue a raw feature row with the probability that was served; never blocks"""
+        if not self.backend.loaded:
+            self.not_ready += 1
+            return
+        try:
+            self._queue.put_nowait((row, probability, primary_version, time.perf_counter()))
+            self.sampled += 1
+        except queue.Full:
+            self.dropped += 1
+
+    def _score(self, X):
+        started = time.perf_counter()
+        probabilities = self.backend.predict_batch(X)
+        return np.asarray(probabilities, dtype=np.float64), time.perf_counter() - started
+
+    def _collect(self):
+        item = self._queue.get()
+        items = []
+        while item is not None:
+            items.append(item)
+            if len(items) >= self.batch_rows:
+                break
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+        return items, item is None
+
+    def _run(self):
+        X = np.empty((self.batch_rows, N_FEATURES), dtype=np.float64)
+        while True:
+            items, stopping = self._collect()
+            if items:
+                self._compare(items, X)
+            if stopping:
+                break
+
+    def _compare(self, items, X):
+        n = len(items)
+        for i, item in enumerate(items):
+            X[i] = item[0]
+        primary = np.array([item[1] for item in items], dtype=np.float64)
+        try:
+            shadow, seconds = self.call(self._score, X[:n])
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Shadow scoring failed for {n} rows: {type(e).__name__}: {e}")
+            return
+        now = time.perf_counter()
+        lag = now - min(item[3] for item in items)
+
+        # Compare against the primary version these rows were served by
+        version = items[-1][2]
+        with self._lock:
+            if version != self._stats.primary_version:
+                self._stats = ShadowStats(version)
+            self._stats.record(primary, shadow, seconds, lag)
+
+    def stats(self):
+        """Counters, queue depth and the comparison summary"""
+        with self._lock:
+            summary = self._stats.summary()
+        return {
+            "backend": self.backend.name,
+            "shadow_version": self.backend.version,
+            "loaded": self.backend.loaded,
+            "sample_rate": self.sample_rate,
+            "queue_depth": self._queue.qsize(),
+            "queue_size": self._queue.maxsize,
+            "sampled": self.sampled,
+            "dropped": self.dropped,
+            "not_ready": self.not_ready,
+            "errors": self.errors,
+            **summary,
+        }
+
+    def reset(self):
+        """Start a fresh comparison window"""
+        with self._lock:
+            self._stats = ShadowStats(self._stats.primary_version)
@@ -0,0 +1,77 @@
+"""
+Fast-start support for servers with heavy backends.
+
+Importing TensorFlow and loading a SavedModel takes seconds. With
+FAST_START=1 the app object is created immediately, the backend is loaded by
+a BackgroundLoader thread, and health checks get an answer while loading is
+still in progress. Import time of every heavy module is measured separately
+so slow backends are easy to spot.
+"""
+import importlib
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+FAST_START = os.getenv("FAST_START", "1") == "1"
+
+
+class BackgroundLoader:
+    """Runs a load function once and tracks its state and timings"""
+
+    def __init__(self, load_fn, name="backend"):
+        self.load_fn = load_fn
+        self.name = name
+        self.state = "pending"
+        self.error = None
+        self.import_seconds = {}
+        self.load_seconds = None
+        self._thread = None
+
+    def timed_import(self, module_name):
+        """Import a module and record how long it took"""
+        started = time.perf_counter()
+        module = importlib.import_module(module_name)
+        elapsed = time.perf_counter() - started
+        self.import_seconds.setdefault(module_name, round(elapsed, 4))
+        logger.info(f"Imported {module_name} in {elapsed * 1000:.1f} ms")
+        return module
+
+    def start(self, background=FAST_START):
+        """Load in a daemon thread (fast start) or inline"""
+        if self.state != "pending":
+            return
+        self.state = "loading"
+        if background:
+            self._thread = threading.Thread(target=self._run, name=f"{self.name}-loader", daemon=True)
+            self._thread.start()
+        else:
+            self._run()
+
+    def _run(self):
+        started = time.perf_counter()
+        try:
+            ok = self.load_fn()
+            self.state = "ready" if ok else "failed"
+        except Exception as e:
+            logger.error(f"❌ {self.name} loading crashed: {type(e).__name__}: {e}")
+            self.error = f"{type(e).__name__}: {e}"
+            self.state = "failed"
+        self.load_seconds = round(time.perf_counter() - started, 4)
+        logger.info(f"{self.name} loading finished: {self.state} in {self.load_seconds:.2f} s")
+
+    @property
+    def ready(self):
+        return self.state == "ready"
+
+    def status(self):
+        """Loading state, error and timings"""
+        return {
+            "backend": self.name,
+            "state": self.state,
+            "error": self.error,
+            "load_seconds": self.load_seconds,
+            "import_seconds": dict(self.import_seconds),
+        }
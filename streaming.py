@@ -0,0 +1,349 @@
+"""
+Streaming bulk scoring for NDJSON and CSV bodies.
+
+POST /predict/stream reads the request body incrementally, parses it into
+fixed-size (STREAM_CHUNK_ROWS, 8) float64 chunks, scores each chunk with one
+backend call and streams the results back in NDJSON or CSV while the upload
+is still in progress. At most one chunk of input lines and one chunk of
+output is held at a time, so memory does not grow with the input size.
+
+Rows that fail to parse or fall outside the PatientData bounds get an error
+record instead of a prediction; the rest of the stream is still scored.
+Result rows are numbered from 0 over the data rows (blank lines and the CSV
+header are not counted).
+"""
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import ClientDisconnect
+from starlette.responses import StreamingResponse
+from features import FEATURE_NAMES, N_FEATURES
+import numpy as np
+import csv
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+STREAM_CHUNK_ROWS = int(os.getenv("STREAM_CHUNK_ROWS", "1024"))
+STREAM_MAX_LINE_BYTES = int(os.getenv("STREAM_MAX_LINE_BYTES", "65536"))
+
+NDJSON_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl", "application/x-jsonlines")
+CSV_TYPES = ("text/csv", "application/csv")
+
+# Documents the raw body of /predict/stream in the OpenAPI schema
+OPENAPI_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "application/x-ndjson": {
+                "schema": {"type": "string"},
+                "example": '{"Pregnancies": 6, "Glucose": 148, "BloodPressure": 72, "SkinThickness": 35, '
+                           '"Insulin": 0, "BMI": 33.6, "DiabetesPedigreeFunction": 0.627, "Age": 50}\n',
+            },
+            "text/csv": {
+                "schema": {"type": "string"},
+                "example": ",".join(FEATURE_NAMES) + "\n6,148,72,35,0,33.6,0.627,50\n",
+            },
+        },
+    }
+}
+
+
+class LineTooLong(ValueError):
+    pass
+
+
+class BodyLines:
+    """Splits an ASGI request body stream into lines without reading it all"""
+
+    def __init__(self, stream, max_line_bytes=STREAM_MAX_LINE_BYTES):
+        self._stream = stream.__aiter__()
+        self._buffer = bytearray()
+        self._pos = 0
+        self._eof = False
+        self.max_line_bytes = max_line_bytes
+
+    async def _fill(self):
+        # Drop consumed bytes before growing the buffer
+        del self._buffer[:self._pos]
+        self._pos = 0
+        if len(self._buffer) > self.max_line_bytes:
+            raise LineTooLong(f"Line longer than {self.max_line_bytes} bytes")
+        try:
+            self._buffer += await self._stream.__anext__()
+        except StopAsyncIteration:
+            self._eof = True
+
+    async def read(self, n_lines):
+        """Up to n_lines non-blank lines; fewer only at the end of the body"""
+        lines = []
+        while len(lines) < n_lines:
+            end = self._buffer.find(b"\n", self._pos)
+            if end < 0:
+                if self._eof:
+                    line = bytes(self._buffer[self._pos:])
+                    self._pos = len(self._buffer)
+                    if line.strip():
+                        lines.append(line)
+                    break
+                await self._fill()
+                continue
+            line = bytes(self._buffer[self._pos:end])
+            self._pos = end + 1
+            if line.strip():
+                lines.append(line)
+        return lines
+
+
+class StreamFormat:
+    """Parses input lines into feature rows and formats scored rows"""
+
+    name = None
+    media_type = None
+
+    def read_header(self, line):
+        """Handle the first line; returns True if it was a header (not data)"""
+        return False
+
+    def parse_row(self, line):
+        """Feature values of one line in FEATURE_NAMES order"""
+        raise NotImplementedError
+
+    def parse(self, lines, out):
+        """Fill out[:len(lines)]; returns {row offset: error message}"""
+        errors = {}
+        for i, line in enumerate(lines):
+            try:
+                out[i] = self.parse_row(line)
+            except LookupError as e:
+                errors[i] = f"{e.args[0]}: Field required"
+            except (TypeError, ValueError):
+                errors[i] = "Input should be a list of 8 numbers or an object with the PatientData fields"
+        return errors
+
+    def output_header(self):
+        return b""
+
+    def format(self, first_row, probabilities, errors):
+        raise NotImplementedError
+
+
+class NdjsonFormat(StreamFormat):
+    """One JSON object (PatientData fields) or 8-number array per line"""
+
+    name = "ndjson"
+    media_type = "application/x-ndjson"
+
+    def parse_row(self, line):
+        values = json.loads(line)
+        if isinstance(values, dict):
+            return [values[name] for name in FEATURE_NAMES]
+        if len(values) != N_FEATURES:
+            raise ValueError(f"Expected {N_FEATURES} values")
+        return values
+
+    def format(self, first_row, probabilities, errors):
+        lines = []
+        for i, probability in enumerate(probabilities):
+            row = first_row + i
+            if probability is None:
+                lines.append(json.dumps({"row": row, "error": errors[i]}))
+            else:
+                # Same threshold as /predict
+                prediction = 1 if probability >= 0.5 else 0
+                outcome = "Diabetes" if prediction == 1 else "No Diabetes"
+                lines.append(
+                    f'{{"row": {row}, "prediction": {prediction}, "probability": {probability!r}, '
+                    f'"predicted_outcome": "{outcome}"}}'
+                )
+        return ("\n".join(lines) + "\n").encode()
+
+    def error(self, message):
+        return (json.dumps({"error": message}) + "\n").encode()
+
+
+class CsvFormat(StreamFormat):
+    """CSV with a header row naming at least the eight feature columns (others are ignored)"""
+
+    name = "csv"
+    media_type = "text/csv"
+
+    def __init__(self):
+        self.columns = None
+
+    def read_header(self, line):
+        header = [name.strip() for name in next(csv.reader([line.decode("utf-8-sig")]))]
+        missing = [name for name in FEATURE_NAMES if name not in header]
+        if missing:
+            raise HTTPException(
+                status_code=422,
+                detail=f"CSV header is missing columns {missing}; expected {FEATURE_NAMES}"
+            )
+        self.columns = [header.index(name) for name in FEATURE_NAMES]
+        return True
+
+    def parse_fields(self, fields):
+        return [float(fields[j]) for j in self.columns]
+
+    def parse(self, lines, out):
+        rows = list(csv.reader(line.decode("utf-8") for line in lines))
+        try:
+            # Fast path: one NumPy conversion for the whole chunk
+            out[:len(rows)] = np.array([[row[j] for j in self.columns] for row in rows], dtype=np.float64)
+            return {}
+        except (IndexError, ValueError):
+            pass
+
+        errors = {}
+        for i, fields in enumerate(rows):
+            try:
+                out[i] = self.parse_fields(fields)
+            except IndexError:
+                errors[i] = f"Expected at least {max(self.columns) + 1} columns"
+            except ValueError:
+                errors[i] = "Input should be a valid number"
+        return errors
+
+    def output_header(self):
+        return b"row,prediction,probability,predicted_outcome,error\n"
+
+    def format(self, first_row, probabilities, errors):
+        lines = []
+        for i, probability in enumerate(probabilities):
+            row = first_row + i
+            if probability is None:
+                message = errors[i].replace('"', '""')
+                lines.append(f'{row},,,,"{message}"')
+            else:
+                prediction = 1 if probability >= 0.5 else 0
+                outcome = "Diabetes" if prediction == 1 else "No Diabetes"
+                lines.append(f"{row},{prediction},{probability!r},{outcome},")
+        return ("\n".join(lines) + "\n").encode()
+
+    def error(self, message):
+        message = message.replace('"', '""')
+        return f',,,,"{message}"\n'.encode()
+
+
+FORMATS = {"ndjson": NdjsonFormat, "csv": CsvFormat}
+
+
+def input_format(content_type):
+    """StreamFormat instance for a request Content-Type, or 415"""
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    if media_type in NDJSON_TYPES:
+        return NdjsonFormat()
+    if media_type in CSV_TYPES:
+        return CsvFormat()
+    raise HTTPException(
+        status_code=415,
+        detail=f"Content-Type must be one of {list(NDJSON_TYPES + CSV_TYPES)}, got {media_type!r}"
+    )
+
+
+class ChunkScorer:
+    """Parses, validates, scores and formats one chunk of rows; runs in a worker thread"""
+
+    def __init__(self, predict_fn, in_format, out_format, validator, chunk_rows=STREAM_CHUNK_ROWS):
+        self.predict_fn = predict_fn
+        self.in_format = in_format
+        self.out_format = out_format
+        # ColumnarValidator: one vectorized bounds check per chunk
+        self.validator = validator
+        self.buffer = np.empty((chunk_rows, N_FEATURES), dtype=np.float64)
+        self.rows_scored = 0
+        self.rows_rejected = 0
+
+    def __call__(self, first_row, lines):
+        X = self.buffer[:len(lines)]
+        errors = self.in_format.parse(lines, X)
+        return self.out_format.format(first_row, *self.probabilities(X, errors))
+
+    def probabilities(self, X, errors=None):
+        """
+        Probability per row of a raw (n, 8) array (None for rejected rows) and
+        the {row offset: error message} dict; X is modified in place
+        """
+        errors = {} if errors is None else errors
+        n_rows = len(X)
+        if errors:
+            # Rows that failed to parse already have their error; do not validate leftovers
+            X[list(errors)] = self.validator.low
+        for i, message in self.validator.messages(X).items():
+            errors.setdefault(i, message)
+
+        if errors:
+            valid = np.ones(n_rows, dtype=bool)
+            valid[list(errors)] = False
+            probabilities = [None] * n_rows
+            if valid.any():
+                for i, probability in zip(np.flatnonzero(valid).tolist(), self.predict_fn(X[valid]).tolist()):
+                    probabilities[i] = probability
+        else:
+            probabilities = self.predict_fn(X).tolist()
+
+        self.rows_scored += n_rows - len(errors)
+        self.rows_rejected += len(errors)
+        return probabilities, errors
+
+
+class StreamingBodyResponse(StreamingResponse):
+    """
+    StreamingResponse that does not listen for disconnects.
+
+    Starlette's version reads receive() in parallel with the body iterator,
+    which would steal the request body this response is still consuming;
+    a disconnect surfaces as ClientDisconnect from request.stream() instead.
+    """
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+
+
+async def stream_predictions(request, predict_fn, validator, output_format=None, chunk_rows=STREAM_CHUNK_ROWS):
+    """Response scoring the request body chunk by chunk as it arrives"""
+    in_format = input_format(request.headers.get("content-type"))
+    if output_format is None:
+        out_format = type(in_format)()
+    elif output_format in FORMATS:
+        out_format = FORMATS[output_format]()
+    else:
+        raise HTTPException(status_code=422, detail=f"format must be one of {sorted(FORMATS)}")
+
+    body = BodyLines(request.stream())
+    # Read the first line before answering so a bad CSV header still gets a 422
+    try:
+        pending = await body.read(1)
+    except LineTooLong as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    if pending and in_format.read_header(pending[0]):
+        pending = []
+    scorer = ChunkScorer(predict_fn, in_format, out_format, validator, chunk_rows)
+
+    async def results():
+        yield out_format.output_header()
+        lines = pending
+        first_row = 0
+        try:
+            while True:
+                lines += await body.read(chunk_rows - len(lines))
+                if not lines:
+                    break
+                yield await run_in_threadpool(scorer, first_row, lines)
+                first_row += len(lines)
+                lines = []
+        except ClientDisconnect:
+            logger.warning(f"Stream client disconnected after {first_row} rows")
+            return
+        except LineTooLong as e:
+            yield out_format.error(f"{e}; stopped after {first_row} rows")
+        except Exception as e:
+            logger.error(f"Stream scoring error after {first_row} rows: {e}")
+            yield out_format.error(f"Prediction failed; stopped after {first_row} rows")
+        logger.info(
+            f"Stream scored {scorer.rows_scored} rows, rejected {scorer.rows_rejected} "
+            f"({in_format.name} -> {out_format.name})"
+        )
+
+    return StreamingBodyResponse(results(), media_type=out_format.media_type)
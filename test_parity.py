@@ -0,0 +1,96 @@
+"""
+Parity of the optimized serving paths against the original models.
+
+Run with `python -m pytest -q`. Each rewrite of the serving path claims to
+reproduce the original model; these tests fail when it drifts.
+"""
+from features import field_bounds, sample_features
+from fusion import FusedScaler
+from schemas import PatientData
+from train_sklearn_model import train_model
+import numpy as np
+import pytest
+
+
+@pytest.fixture(scope="module")
+def forest_and_scaler():
+    return train_model()
+
+
+@pytest.fixture(scope="module")
+def keras_model():
+    """Untrained network with the architecture of rebuild_model.py"""
+    tf = pytest.importorskip("tensorflow")
+    tf.keras.utils.set_random_seed(0)
+    return tf.keras.Sequential([
+        tf.keras.layers.Input(shape=(8,)),
+        tf.keras.layers.Dense(16, activation="relu"),
+        tf.keras.layers.Dropout(0.3),
+        tf.keras.layers.Dense(8, activation="relu"),
+        tf.keras.layers.Dense(1, activation="sigmoid"),
+    ])
+
+
+@pytest.fixture(scope="module")
+def rows():
+    """Raw (n, 8) rows drawn inside the PatientData bounds"""
+    return sample_features(field_bounds(PatientData), 2000, seed=1)
+
+
+def test_fused_scaler_matches_sklearn(forest_and_scaler, rows):
+    _, scaler = forest_and_scaler
+    X = rows.copy()
+    scaled = FusedScaler(scaler).transform(X)
+    # Scaled in place, with exactly the same float64 results
+    assert scaled is X
+    assert np.array_equal(scaled, scaler.transform(rows))
+
+
+def test_compiled_forest_matches_sklearn(forest_and_scaler, rows):
+    from forest_engine import CompiledForest
+
+    forest, scaler = forest_and_scaler
+    expected = forest.predict_proba(scaler.transform(rows))
+    # The serving path: fused in-place scaling, then the flattened trees
+    actual = CompiledForest(forest).predict_proba(FusedScaler(scaler).transform(rows.copy()))
+    assert np.array_equal(actual, expected)
+
+
+
+def _onnx_session(path):
+    ort = pytest.importorskip("onnxruntime")
+    return ort.InferenceSession(path, providers=["CPUExecutionProvider"])
+
+
+def test_forest_onnx_matches_sklearn(forest_and_scaler, rows, tmp_path):
+    pytest.importorskip("skl2onnx")
+    from onnx_export import ONNX_PARITY_ATOL, export_forest_onnx, onnx_predict
+
+    forest, scaler = forest_and_scaler
+    path = str(tmp_path / "forest.onnx")
+    export_forest_onnx(forest, scaler, path)
+    expected = forest.predict_proba(scaler.transform(rows))[:, 1]
+    assert np.allclose(onnx_predict(_onnx_session(path), rows), expected, rtol=0, atol=ONNX_PARITY_ATOL)
+
+
+def test_keras_onnx_matches_keras(keras_model, forest_and_scaler, rows, tmp_path):
+    pytest.importorskip("onnx")
+    from onnx_export import ONNX_PARITY_ATOL, export_keras_onnx, onnx_predict
+
+    _, scaler = forest_and_scaler
+    path = str(tmp_path / "network.onnx")
+    export_keras_onnx(keras_model, scaler, path)
+    expected = keras_model.predict(scaler.transform(rows), batch_size=len(rows), verbose=0)[:, 0]
+    assert np.allclose(onnx_predict(_onnx_session(path), rows), expected, rtol=0, atol=ONNX_PARITY_ATOL)
+
+
+def test_numpy_mlp_matches_keras(keras_model, forest_and_scaler, rows, tmp_path):
+    from fusion import KERAS_PARITY_ATOL
+    from mlp_engine import NumpyMLP, export_keras_mlp
+
+    _, scaler = forest_and_scaler
+    path = str(tmp_path / "network.npz")
+    export_keras_mlp(keras_model, scaler, path)
+    expected = keras_model.predict(scaler.transform(rows), batch_size=len(rows), verbose=0)[:, 0]
+    actual = NumpyMLP.load(path).predict(rows.copy())
+    assert np.allclose(actual, expected, rtol=0, atol=KERAS_PARITY_ATOL)
@@ -0,0 +1,98 @@
+"""
+ColumnarValidator against PatientData itself.
+
+/predict validates a body with PatientData; /predict/batch, compact bodies
+and jobs use ColumnarValidator. These tests fail when the two disagree on
+whether a row is valid, on the values read from it, or on the errors.
+"""
+from features import FEATURE_NAMES
+from schemas import PatientData
+from validation import ColumnarValidator
+from pydantic import ValidationError
+import numpy as np
+import pytest
+
+VALID = {
+    "Pregnancies": 6, "Glucose": 148, "BloodPressure": 72, "SkinThickness": 35,
+    "Insulin": 0, "BMI": 33.6, "DiabetesPedigreeFunction": 0.627, "Age": 50,
+}
+
+# (field, value) replacing one value of VALID
+CASES = [
+    # Numeric strings, parsed the way pydantic's lax mode does
+    ("Pregnancies", "10"), ("Pregnancies", " 10 "), ("Pregnancies", "10.0"), ("Pregnancies", "1e1"),
+    ("Pregnancies", "0x10"), ("Pregnancies", ""), ("Glucose", "1e1"), ("Glucose", "148.5"),
+    ("Glucose", "nan"), ("Glucose", "abc"), ("Age", "500"),
+    # Bools
+    ("Pregnancies", True), ("Glucose", False), ("Age", True), ("Age", False),
+    # Floats in int fields
+    ("Pregnancies", 3.0), ("Pregnancies", 3.5), ("Age", 1e300),
+    # NaN / inf
+    ("Pregnancies", float("nan")), ("Age", float("inf")), ("Glucose", float("nan")),
+    ("BMI", float("inf")), ("Insulin", float("-inf")),
+    # Out of bounds, wrong types
+    ("Glucose", -1), ("Pregnancies", 2 ** 70), ("BMI", None), ("BMI", [1]), ("BMI", {"value": 1}),
+]
+
+
+def _row(field, value):
+    return {**VALID, field: value}
+
+
+def _model_errors(row):
+    """(loc, type, msg) of what /predict reports for row, empty if it is accepted"""
+    try:
+        PatientData.model_validate(row, from_attributes=True)
+    except ValidationError as e:
+        return [(tuple(error["loc"]), error["type"], error["msg"]) for error in e.errors()]
+    return []
+
+
+def _columnar_errors(validator, rows, array_rows=False):
+    X = validator.to_array(rows, array_rows)
+    errors = validator.errors(X, rows, loc=(), array_rows=array_rows)
+    return X, [(tuple(error["loc"]), error["type"], error["msg"]) for error in errors]
+
+
+@pytest.fixture(scope="module")
+def validator():
+    return ColumnarValidator(PatientData)
+
+
+@pytest.mark.parametrize("field, value", CASES)
+def test_row_matches_patient_data(validator, field, value):
+    row = _row(field, value)
+    X, errors = _columnar_errors(validator, [row])
+    assert errors == [((0, *loc), kind, msg) for loc, kind, msg in _model_errors(row)]
+    if not errors:
+        # Accepted rows carry the values pydantic parsed
+        model = PatientData.model_validate(row)
+        assert X[0].tolist() == [float(getattr(model, name)) for name in FEATURE_NAMES]
+
+
+@pytest.mark.parametrize("missing", ["Pregnancies", "BMI", "Age"])
+def test_missing_key_matches_patient_data(validator, missing):
+    row = {name: value for name, value in VALID.items() if name != missing}
+    _, errors = _columnar_errors(validator, [row])
+    assert errors == [((0, *loc), kind, msg) for loc, kind, msg in _model_errors(row)]
+
+
+def test_batch_matches_patient_data(validator):
+    # One batch mixing every case with valid rows, as dicts and as 8-value lists
+    rows = [VALID] + [_row(field, value) for field, value in CASES] + [VALID]
+    expected = [
+        ((i, *loc), kind, msg)
+        for i, row in enumerate(rows)
+        for loc, kind, msg in _model_errors(row)
+    ]
+    assert _columnar_errors(validator, rows)[1] == expected
+
+    arrays = [[row[name] for name in FEATURE_NAMES] for row in rows]
+    assert _columnar_errors(validator, arrays, array_rows=True)[1] == expected
+
+
+def test_valid_numeric_batch(validator):
+    X, errors = _columnar_errors(validator, [VALID] * 3)
+    assert errors == []
+    assert X.dtype == np.float64
+    assert np.array_equal(X, np.tile([float(VALID[name]) for name in FEATURE_NAMES], (3, 1)))
@@ -0,0 +1,115 @@
+"""
+Compiled TensorFlow serving path for the Keras network.
+
+model.predict builds a data adapter, callbacks and a step function on every
+call, which dominates latency for the one-row requests the API sees. In
+"function" mode the model is wrapped in a tf.function and one concrete
+function with a fixed input shape is traced per padded batch-size bucket
+(1, 2, 4, ... TF_MAX_BUCKET) at load time. Inputs are zero-padded up to the
+next bucket and the model is called directly on a tensor, so requests never
+retrace. Larger batches are split into TF_MAX_BUCKET-row chunks.
+
+TensorFlow's intra-/inter-op thread pools are pinned from config before the
+runtime starts (intra-op defaults to NATIVE_THREADS, see executor.py).
+"""
+from batching import batch_size_buckets
+from executor import NATIVE_THREADS
+from features import N_FEATURES
+import numpy as np
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# "function" (padded tf.function signatures) or "predict" (model.predict per call)
+KERAS_SERVING = os.getenv("KERAS_SERVING", "function").lower()
+TF_MAX_BUCKET = int(os.getenv("TF_MAX_BUCKET", "256"))
+TF_INTRA_OP_THREADS = int(os.getenv("TF_INTRA_OP_THREADS", str(NATIVE_THREADS)))
+TF_INTER_OP_THREADS = int(os.getenv("TF_INTER_OP_THREADS", "1"))
+
+# Same tolerance as the scaler fold: both paths run the network in float32
+SIGNATURE_PARITY_ATOL = 1e-5
+
+
+_pinned = False
+
+
+def pin_threads(tf, intra_op=TF_INTRA_OP_THREADS, inter_op=TF_INTER_OP_THREADS):
+    """Size TensorFlow's thread pools; only possible before the first op runs"""
+    global _pinned
+    if _pinned:
+        # Hot reload: the pools were sized by the first load
+        return True
+    try:
+        tf.config.threading.set_intra_op_parallelism_threads(intra_op)
+        tf.config.threading.set_inter_op_parallelism_threads(inter_op)
+    except RuntimeError as e:
+        logger.warning(f"TensorFlow already initialized, thread pools not pinned: {e}")
+        return False
+    _pinned = True
+    logger.info(f"✓ TensorFlow threads pinned (intra-op {intra_op}, inter-op {inter_op})")
+    return True
+
+
+class PaddedSignature:
+    """Calls a Keras model through per-bucket concrete functions with fixed input shapes"""
+
+    def __init__(self, model, max_bucket=TF_MAX_BUCKET):
+        import tensorflow as tf
+
+        self._tf = tf
+        self.buckets = batch_size_buckets(max_bucket)
+        self.max_bucket = self.buckets[-1]
+
+        @tf.function
+        def serve(x):
+            return model(x, training=False)
+
+        # Trace every bucket now so no request pays for tracing
+        self._functions = {
+            size: serve.get_concrete_function(tf.TensorSpec([size, N_FEATURES], tf.float32))
+            for size in self.buckets
+        }
+
+    def bucket_for(self, n_rows):
+        """Smallest bucket holding n_rows (n_rows <= max_bucket)"""
+        return next(size for size in self.buckets if size >= n_rows)
+
+    def predict(self, X):
+        """First output column for an (n, 8) array, like model.predict(X)[:, 0]"""
+        n_rows = len(X)
+        if n_rows > self.max_bucket:
+            return np.concatenate([
+                self.predict(X[start:start + self.max_bucket])
+                for start in range(0, n_rows, self.max_bucket)
+            ])
+
+        size = self.bucket_for(n_rows)
+        padded = np.zeros((size, N_FEATURES), dtype=np.float32)
+        padded[:n_rows] = X
+        return self._functions[size](self._tf.constant(padded)).numpy()[:n_rows, 0]
+
+
+def select_keras_signature(model, rows):
+    """
+    PaddedSignature for `model` if KERAS_SERVING allows it and it matches
+    model.predict on `rows` (already in the model's input space), else None
+    """
+    if KERAS_SERVING != "function":
+        return None
+    try:
+        signature = PaddedSignature(model)
+    except Exception as e:
+        logger.warning(f"Could not trace serving signature: {type(e).__name__}: {e}")
+        return None
+
+    expected = model.predict(rows, batch_size=len(rows), verbose=0)[:, 0]
+    max_diff = float(np.max(np.abs(signature.predict(rows) - expected)))
+    if max_diff > SIGNATURE_PARITY_ATOL:
+        logger.warning(f"Serving signature differs by {max_diff:.2e}, using model.predict")
+        return None
+    logger.info(
+        f"✓ Serving signature traced for batch sizes {signature.buckets} "
+        f"(max parity diff {max_diff:.2e})"
+    )
+    return signature
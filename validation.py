@@ -0,0 +1,153 @@
+"""
+Columnar validation of PatientData batches.
+
+Validating a batch through List[PatientData] builds one pydantic model per
+patient and checks it field by field, which dominates the cost of large
+/predict/batch and job bodies. ColumnarValidator instead derives the bounds
+and int/float types from the PatientData Field definitions once, packs the
+rows into one (n, 8) float64 array and checks the whole batch with a single
+NumPy pass: out of bounds, NaN, or fractional values in int fields.
+
+Valid rows never touch pydantic. Only the rows that fail (or could not be
+read as numbers) are run through PatientData to describe what is wrong, the
+way FastAPI validates a body, so the errors are exactly FastAPI's 422
+errors, with loc prefixed by the row index. Rows holding strings are parsed
+by PatientData as well, so "10" is accepted and "1e1" in an int field is
+rejected exactly as on /predict.
+
+Used by /predict/batch and the compact bodies (compact.py), JSON job
+submissions, and the per-row error records of /predict/stream, jobs and
+bulk_score.py.
+"""
+from operator import itemgetter
+from pydantic import ValidationError
+from features import FEATURE_NAMES, N_FEATURES, bound_arrays, field_bounds, invalid_features
+import math
+import numpy as np
+
+_get_features = itemgetter(*FEATURE_NAMES)
+
+
+def _json_safe(value):
+    """Error input values with NaN/inf replaced by strings (JSON has neither)"""
+    if isinstance(value, float) and not math.isfinite(value):
+        return str(value)
+    if isinstance(value, dict):
+        return {key: _json_safe(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_safe(item) for item in value]
+    return value
+
+
+def _number(value):
+    value = float(value)
+    return int(value) if value.is_integer() else value
+
+
+class ColumnarValidator:
+    """Validates (n, 8) feature batches against a pydantic model's Field bounds and int fields"""
+
+    def __init__(self, model_cls):
+        self.model_cls = model_cls
+        self.bounds = field_bounds(model_cls)
+        self.low, self.high, self.is_int = bound_arrays(self.bounds)
+
+    def to_array(self, rows, array_rows=True):
+        """
+        (n, 8) float64 array from decoded rows (PatientData-like dicts, or
+        8-number lists if array_rows); rows that cannot be read as numbers
+        are left NaN, so they fail validation
+        """
+        n_rows = len(rows)
+        try:
+            # Fast path: one NumPy conversion for the whole batch. Inferring the
+            # dtype first keeps strings out, which NumPy would parse more
+            # loosely than pydantic ("1e1" is not a valid int)
+            X = np.array([
+                _get_features(row) if isinstance(row, dict) else row if array_rows else ()
+                for row in rows
+            ])
+            if X.shape == (n_rows, N_FEATURES) and X.dtype.kind in "biuf":
+                return X.astype(np.float64, copy=False)
+        except (KeyError, TypeError, ValueError):
+            pass
+
+        X = np.full((n_rows, N_FEATURES), np.nan)
+        for i, row in enumerate(rows):
+            try:
+                values = _get_features(row) if isinstance(row, dict) else row if array_rows else ()
+                if len(values) != N_FEATURES:
+                    continue
+                if all(isinstance(value, (int, float)) for value in values):
+                    X[i] = values
+                else:
+                    X[i] = self._parse(row if isinstance(row, dict) else dict(zip(FEATURE_NAMES, values)))
+            except (KeyError, TypeError, ValueError):
+                pass
+        return X
+
+    def _parse(self, data):
+        """Features of a row with non-numbers (e.g. "10"), read the way pydantic does; NaN if it rejects them"""
+        try:
+            model = self.model_cls.model_validate(data, from_attributes=True)
+        except ValidationError:
+            return np.nan
+        return [getattr(model, name) for name in FEATURE_NAMES]
+
+    def invalid(self, X):
+        """(n,) mask of rows with a value out of bounds, NaN, or fractional in an int field"""
+        return invalid_features(X, self.low, self.high, self.is_int).any(axis=1)
+
+    def errors(self, X, rows=None, loc=("body",), indexed=True, array_rows=True):
+        """
+        FastAPI-style error dicts for every invalid row of X (empty if all are
+        valid). rows are the decoded originals, if any, so errors report the
+        submitted values; loc is [*loc, row, field], or [*loc, field] when not indexed
+        """
+        errors = []
+        for i in np.flatnonzero(self.invalid(X)).tolist():
+            data = rows[i] if rows is not None else dict(zip(FEATURE_NAMES, X[i].tolist()))
+            if array_rows and isinstance(data, (list, tuple)) and len(data) == N_FEATURES:
+                data = dict(zip(FEATURE_NAMES, data))
+            errors.extend(self.row_errors(data, X[i], [*loc, i] if indexed else list(loc)))
+        return errors
+
+    def row_errors(self, data, values, loc):
+        """Errors of one invalid row, as FastAPI reports them for data"""
+        try:
+            # from_attributes like FastAPI's body validation, so messages match
+            self.model_cls.model_validate(data, from_attributes=True)
+        except ValidationError as e:
+            return [
+                {**error, "loc": [*loc, *error["loc"]], "input": _json_safe(error["input"])}
+                for error in e.errors()
+            ]
+        # pydantic accepted the original values but not the array (e.g. float32 rounding)
+        return self._bound_errors(values, loc)
+
+    def _bound_errors(self, values, loc):
+        errors = []
+        invalid = invalid_features(values, self.low, self.high, self.is_int)
+        for j in np.flatnonzero(invalid).tolist():
+            value, low, high = float(values[j]), self.low[j], self.high[j]
+            error = {"type": None, "loc": [*loc, FEATURE_NAMES[j]], "msg": None, "input": _json_safe(value)}
+            if not value >= low:
+                error.update(type="greater_than_equal", ctx={"ge": _number(low)},
+                             msg=f"Input should be greater than or equal to {low:g}")
+            elif not value <= high:
+                error.update(type="less_than_equal", ctx={"le": _number(high)},
+                             msg=f"Input should be less than or equal to {high:g}")
+            else:
+                error.update(type="int_from_float",
+                             msg="Input should be a valid integer, got a number with a fractional part")
+            errors.append(error)
+        return errors
+
+    def messages(self, X):
+        """{row: "Field: message"} with the first error of every invalid row, for per-row error records"""
+        messages = {}
+        for error in self.errors(X, loc=()):
+            row, field = error["loc"][0], error["loc"][1:]
+            if row not in messages:
+                messages[row] = f"{'.'.join(map(str, field))}: {error['msg']}" if field else error["msg"]
+        return messages
@@ -0,0 +1,44 @@
+"""
+Warm-up before readiness.
+
+The first calls into a freshly loaded model are slow: Keras traces its
+predict function, sklearn/NumPy fault in pages and allocate buffers. Before a
+server reports ready on /readyz it scores representative batches (drawn from
+the PatientData field ranges) at every batch size the micro-batcher can
+produce, and records how long each took.
+"""
+from batching import BATCHER_MAX_BATCH_SIZE, batch_size_buckets
+from features import sample_features
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "1") == "1"
+WARMUP_ROUNDS = int(os.getenv("WARMUP_ROUNDS", "3"))
+
+
+def warm_up(score_fn, bounds, batch_sizes=None, rounds=WARMUP_ROUNDS):
+    """Run score_fn over sample batches; returns per-batch-size timings in ms"""
+    if batch_sizes is None:
+        batch_sizes = batch_size_buckets(BATCHER_MAX_BATCH_SIZE)
+
+    started = time.perf_counter()
+    timings = {}
+    for size in batch_sizes:
+        durations = []
+        for round_index in range(max(1, rounds)):
+            # Fresh rows every call: score_fn may scale its input in place
+            rows = sample_features(bounds, size, seed=round_index)
+            call_started = time.perf_counter()
+            score_fn(rows)
+            durations.append((time.perf_counter() - call_started) * 1000)
+        timings[str(size)] = {
+            "first_ms": round(durations[0], 3),
+            "last_ms": round(durations[-1], 3),
+        }
+
+    total_ms = (time.perf_counter() - started) * 1000
+    logger.info(f"✓ Warm-up finished in {total_ms:.1f} ms over batch sizes {list(batch_sizes)}")
+    return {"total_ms": round(total_ms, 3), "rounds": max(1, rounds), "batch_sizes": timings}